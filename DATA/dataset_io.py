@@ -0,0 +1,148 @@
+"""
+Columnar binary format for the flood dataset
+Writes a typed NumPy .npz next to each CSV and loads it instead of re-parsing the text
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+CATEGORICAL_COLS = ('ward_name', 'zone')
+
+def columnar_path(csv_path):
+    """delhi_flood_data.csv -> delhi_flood_data.npz"""
+    return os.path.splitext(csv_path)[0] + '.npz'
+
+def csv_signature(csv_path):
+    """Size and mtime of the CSV, stored in the .npz to detect a stale copy"""
+    stat = os.stat(csv_path)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+def compact_frame(df):
+    """float32 measurements, smallest integer types (int8 risk labels), categorical strings"""
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if col in CATEGORICAL_COLS or series.dtype == object:
+            columns[col] = series.astype('category')
+        elif pd.api.types.is_float_dtype(series):
+            columns[col] = series.astype(np.float32)
+        else:
+            columns[col] = pd.to_numeric(series, downcast='integer')
+    return pd.DataFrame(columns)
+
+def to_float64(values):
+    """Widen float32 values back to the decimals they were written with (0.55, not 0.550000011920929)"""
+    values = np.asarray(values)
+    if values.dtype == np.float32:
+        return values.astype(str).astype(np.float64)
+    return values.astype(np.float64)
+
+def write_columnar(df, csv_path):
+    """Write df as the columnar copy of csv_path (atomically replaced)"""
+    df = compact_frame(df)
+    arrays = {
+        '__version__': np.array(FORMAT_VERSION),
+        '__columns__': np.array(df.columns, dtype=str),
+        '__csv_signature__': csv_signature(csv_path) if os.path.exists(csv_path) else np.zeros(2, np.int64)
+    }
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            arrays[f'{col}__codes'] = series.cat.codes.to_numpy()
+            arrays[f'{col}__categories'] = np.array(series.cat.categories, dtype=str)
+        else:
+            arrays[col] = series.to_numpy()
+
+    path = columnar_path(csv_path)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+def convert_csv(csv_path):
+    """Parse a CSV once and write its columnar copy; used by the dataset generators"""
+    path = write_columnar(pd.read_csv(csv_path), csv_path)
+    print(f"[INFO] Columnar copy: {path}")
+    return path
+
+def load_columnar(path):
+    """Read a .npz written by write_columnar into a typed DataFrame"""
+    with np.load(path) as data:
+        columns = {}
+        for col in data['__columns__'].tolist():
+            if f'{col}__codes' in data.files:
+                columns[col] = pd.Categorical.from_codes(data[f'{col}__codes'], data[f'{col}__categories'])
+            else:
+                columns[col] = data[col]
+    return pd.DataFrame(columns)
+
+def is_fresh(csv_path):
+    """True if the columnar copy exists and was written from the current CSV"""
+    path = columnar_path(csv_path)
+    if not os.path.exists(path):
+        return False
+    if not os.path.exists(csv_path):
+        return True  # columnar-only dataset
+    try:
+        with np.load(path) as data:
+            return (int(data['__version__']) == FORMAT_VERSION
+                    and np.array_equal(data['__csv_signature__'], csv_signature(csv_path)))
+    except (OSError, KeyError, ValueError):
+        return False
+
+def load_manifest(manifest_path, refresh=True):
+    """Concatenate the part files listed in a sharded dataset manifest"""
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(manifest_path)
+    parts = [load_dataset(os.path.join(base_dir, shard['path']), refresh) for shard in manifest['shards']]
+    # Parts have different ward dictionaries; compact_frame rebuilds one shared categorical
+    return compact_frame(pd.concat(parts, ignore_index=True))
+
+def load_dataset(csv_path, refresh=True):
+    """Load the dataset, preferring a fresh columnar copy over parsing the CSV
+
+    A missing or stale copy is rebuilt from the CSV when refresh is set.
+    A *.manifest.json path loads every part of a sharded dataset.
+    Columns always come back compact (see compact_frame).
+    """
+    if csv_path.endswith('.manifest.json'):
+        return load_manifest(csv_path, refresh)
+    if is_fresh(csv_path):
+        return load_columnar(columnar_path(csv_path))
+
+    df = pd.read_csv(csv_path)
+    if refresh:
+        try:
+            write_columnar(df, csv_path)
+        except OSError as e:
+            print(f"Warning: Could not write columnar dataset: {e}")
+    return compact_frame(df)
+
+def dataset_parts(csv_path):
+    """CSV paths making up a dataset: the parts of a manifest, or the file itself"""
+    if not csv_path.endswith('.manifest.json'):
+        return [csv_path]
+    with open(csv_path) as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(csv_path)
+    return [os.path.join(base_dir, shard['path']) for shard in manifest['shards']]
+
+def count_rows(csv_path):
+    """Row count without parsing (one streaming pass over the bytes)"""
+    rows = 0
+    for part in dataset_parts(csv_path):
+        with open(part, 'rb') as f:
+            rows += sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b'')) - 1
+    return rows
+
+def iter_chunks(csv_path, chunk_size, columns=None):
+    """Yield compact DataFrames of at most chunk_size rows; memory is bounded by one chunk"""
+    for part in dataset_parts(csv_path):
+        for chunk in pd.read_csv(part, usecols=columns, chunksize=chunk_size):
+            yield compact_frame(chunk)
@@ -1,6 +1,6 @@
-import pandas as pd
+from dataset_io import load_dataset
 
-df = pd.read_csv('delhi_flood_data.csv')
+df = load_dataset('delhi_flood_data.csv')
 wards = sorted(df['ward_name'].unique().tolist())
 
 print("const WARDS = [")
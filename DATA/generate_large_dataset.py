@@ -0,0 +1,302 @@
+"""
+Vectorized generator for large synthetic flood datasets (millions of rows)
+Same wards, scenario mix and risk rules as generate_1000_records.py, drawn as NumPy arrays
+and written in chunks so memory stays bounded at any row count
+With --shards, generation is split by ward or scenario across a process pool into part files
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from generate_1000_records import BASE_WARDS
+
+COLUMNS = [
+    'cell_id', 'latitude', 'longitude', 'ward_name', 'zone',
+    'distance_to_yamuna_m', 'rain_1h_mm', 'rain_3h_mm', 'rain_24h_mm',
+    'rain_forecast_3h_mm', 'elevation_m', 'slope_percent', 'impervious_ratio',
+    'drain_density', 'drain_capacity_score', 'drain_blockage_risk',
+    'yamuna_level_m', 'flooded_before', 'flood_frequency',
+    'citizen_reports_count', 'avg_reported_depth_cm', 'max_flood_depth_cm',
+    'flood_risk_level'
+]
+
+SCENARIOS = ['normal', 'light_rain', 'moderate_rain', 'heavy_rain', 'extreme_rain']
+SCENARIO_WEIGHTS = [0.25, 0.25, 0.25, 0.15, 0.10]
+
+# Per-scenario (low, high) draw ranges, indexed like SCENARIOS
+RAIN_24H_RANGE = np.array([(5, 25), (25, 50), (50, 85), (85, 110), (110, 150)], dtype=float)
+RAIN_3H_RATIO_RANGE = np.array([(0.30, 0.45), (0.35, 0.50), (0.40, 0.55), (0.45, 0.60), (0.50, 0.65)])
+YAMUNA_RANGE = np.array([(203.0, 203.5), (203.2, 203.8), (203.8, 204.5), (204.2, 204.8), (204.5, 206.0)])
+BLOCKAGE_RANGE = np.array([(0.30, 0.50), (0.40, 0.60), (0.50, 0.70), (0.65, 0.80), (0.75, 0.95)])
+CAPACITY_RANGE = np.array([(0.72, 0.88), (0.65, 0.82), (0.60, 0.75), (0.50, 0.68), (0.45, 0.60)])
+
+# Elevation (low, high) by zone; zones not listed use the default
+ELEVATION_BY_ZONE = {"South": (220, 230), "East": (205, 212), "Central": (214, 222)}
+DEFAULT_ELEVATION = (215, 225)
+
+WARD_NAMES = np.array([ward[0] for ward in BASE_WARDS])
+WARD_ZONES = np.array([ward[1] for ward in BASE_WARDS])
+WARD_LAT = np.array([ward[2] for ward in BASE_WARDS])
+WARD_LNG = np.array([ward[3] for ward in BASE_WARDS])
+WARD_DIST = np.array([ward[4] for ward in BASE_WARDS], dtype=float)
+WARD_ELEVATION = np.array([ELEVATION_BY_ZONE.get(zone, DEFAULT_ELEVATION) for zone in WARD_ZONES], dtype=float)
+
+def uniform_in(rng, ranges, index):
+    """One uniform draw per row from ranges[index] = (low, high)"""
+    bounds = ranges[index]
+    return rng.uniform(bounds[:, 0], bounds[:, 1])
+
+def generate_chunk(rng, n_rows, first_cell_id=1000, ward_pool=None, scenario_pool=None):
+    """Generate n_rows records as a DataFrame (vectorized generate_record)
+
+    ward_pool / scenario_pool restrict draws to those BASE_WARDS / SCENARIOS indices;
+    scenario weights are renormalized over the pool.
+    """
+    if ward_pool is None:
+        ward_ids = rng.integers(0, len(BASE_WARDS), n_rows)
+    else:
+        ward_ids = rng.choice(np.asarray(ward_pool), size=n_rows)
+    if scenario_pool is None:
+        scenario_pool = np.arange(len(SCENARIOS))
+    scenario_pool = np.asarray(scenario_pool)
+    weights = np.asarray(SCENARIO_WEIGHTS)[scenario_pool]
+    scenario = rng.choice(scenario_pool, size=n_rows, p=weights / weights.sum())
+
+    lat = WARD_LAT[ward_ids] + rng.uniform(-0.01, 0.01, n_rows)
+    lng = WARD_LNG[ward_ids] + rng.uniform(-0.01, 0.01, n_rows)
+    dist_yamuna = WARD_DIST[ward_ids] + rng.uniform(-200, 200, n_rows)
+    elevation = uniform_in(rng, WARD_ELEVATION, ward_ids)
+    slope = rng.uniform(1.0, 5.5, n_rows)
+    impervious = rng.uniform(0.55, 0.92, n_rows)
+    drain_density = rng.uniform(0.35, 0.72, n_rows)
+
+    # Scenario-based conditions
+    rain_24h = uniform_in(rng, RAIN_24H_RANGE, scenario)
+    rain_3h = rain_24h * uniform_in(rng, RAIN_3H_RATIO_RANGE, scenario)
+    yamuna = uniform_in(rng, YAMUNA_RANGE, scenario)
+    blockage_risk = uniform_in(rng, BLOCKAGE_RANGE, scenario)
+    drain_capacity = uniform_in(rng, CAPACITY_RANGE, scenario)
+
+    rain_1h = rain_3h * rng.uniform(0.28, 0.42, n_rows)
+    rain_forecast_3h = rain_3h * rng.uniform(1.05, 1.25, n_rows)
+
+    # Historical data - independent of current risk
+    historical_risk_factor = np.where(
+        elevation < 210, (1 - drain_capacity) * 0.5 + (210 - elevation) / 50, 0.0
+    ).clip(0, 1)
+    flooded_before = (rng.random(n_rows) < historical_risk_factor).astype(np.int64)
+    flood_frequency = np.where(
+        flooded_before == 1, rng.integers(1, 7, n_rows), rng.integers(0, 2, n_rows)
+    )
+
+    # Risk score from actual conditions (same thresholds as generate_record)
+    risk_score = (
+        np.select([rain_24h > 100, rain_24h > 70, rain_24h > 50], [2.0, 1.5, 1.0], 0.0)
+        + np.select([yamuna > 204.8, yamuna > 204.3, yamuna > 204.0], [1.5, 1.0, 0.5], 0.0)
+        + np.select([blockage_risk > 0.80, blockage_risk > 0.65], [1.5, 1.0], 0.0)
+        + np.select([drain_capacity < 0.55, drain_capacity < 0.65], [1.0, 0.5], 0.0)
+        + np.select([elevation < 210, elevation < 212], [0.5, 0.3], 0.0)
+        + np.where((flooded_before == 1) & (flood_frequency > 3), 0.3, 0.0)
+    )
+    risk_level = np.select([risk_score >= 4.5, risk_score >= 2.5], [2, 1], 0)
+
+    # 5% label noise: Danger -> {1, 2}, Safe -> {0, 1}, Warning -> {0, 1, 2}
+    noisy_level = np.select(
+        [risk_level == 2, risk_level == 0],
+        [rng.integers(1, 3, n_rows), rng.integers(0, 2, n_rows)],
+        rng.integers(0, 3, n_rows)
+    )
+    risk_level = np.where(rng.random(n_rows) < 0.05, noisy_level, risk_level)
+
+    # Citizen reports from actual conditions, in four depth tiers
+    estimated_depth = np.maximum(
+        0, rain_24h * 0.4 + (yamuna - 203.0) * 15 - drain_capacity * 30 - (elevation - 205) * 2
+    )
+    tier = np.select([estimated_depth > 40, estimated_depth > 20, estimated_depth > 5], [3, 2, 1], 0)
+    reports = rng.integers(
+        np.array([0, 0, 3, 8])[tier], np.array([2, 5, 12, 20])[tier] + 1
+    )
+    avg_depth = rng.uniform(np.array([0, 5, 15, 30])[tier], np.array([8, 18, 35, 60])[tier])
+    max_depth = rng.uniform(np.array([0, 10, 25, 50])[tier], np.array([12, 25, 55, 100])[tier])
+    no_reports = (tier <= 1) & (reports == 0)
+    avg_depth = np.where(no_reports, 0.0, avg_depth)
+    max_depth = np.where(no_reports, 0.0, max_depth)
+
+    # Realistic noise
+    reports = np.maximum(0, reports + rng.integers(-2, 3, n_rows))
+    avg_depth = np.maximum(0, avg_depth + rng.uniform(-3, 3, n_rows))
+    max_depth = np.maximum(0, max_depth + rng.uniform(-5, 5, n_rows))
+
+    return pd.DataFrame({
+        'cell_id': np.arange(first_cell_id, first_cell_id + n_rows),
+        'latitude': lat.round(4),
+        'longitude': lng.round(4),
+        'ward_name': WARD_NAMES[ward_ids],
+        'zone': WARD_ZONES[ward_ids],
+        'distance_to_yamuna_m': dist_yamuna.round(1),
+        'rain_1h_mm': rain_1h.round(1),
+        'rain_3h_mm': rain_3h.round(1),
+        'rain_24h_mm': rain_24h.round(1),
+        'rain_forecast_3h_mm': rain_forecast_3h.round(1),
+        'elevation_m': elevation.round(1),
+        'slope_percent': slope.round(1),
+        'impervious_ratio': impervious.round(2),
+        'drain_density': drain_density.round(2),
+        'drain_capacity_score': drain_capacity.round(2),
+        'drain_blockage_risk': blockage_risk.round(2),
+        'yamuna_level_m': yamuna.round(1),
+        'flooded_before': flooded_before,
+        'flood_frequency': flood_frequency,
+        'citizen_reports_count': reports,
+        'avg_reported_depth_cm': avg_depth.round(1),
+        'max_flood_depth_cm': max_depth.round(1),
+        'flood_risk_level': risk_level
+    }, columns=COLUMNS)
+
+def write_dataset(csv_path, n_rows, seed=42, chunk_size=250_000, first_cell_id=1000,
+                  ward_pool=None, scenario_pool=None):
+    """Generate n_rows records into csv_path chunk by chunk; returns the risk level counts
+
+    seed may be an int or a np.random.SeedSequence.
+    """
+    rng = np.random.default_rng(seed)
+    risk_counts = np.zeros(3, dtype=np.int64)
+
+    for first in range(0, n_rows, chunk_size):
+        chunk = generate_chunk(
+            rng, min(chunk_size, n_rows - first), first_cell_id=first_cell_id + first,
+            ward_pool=ward_pool, scenario_pool=scenario_pool
+        )
+        chunk.to_csv(csv_path, mode='w' if first == 0 else 'a', header=first == 0, index=False)
+        risk_counts += np.bincount(chunk['flood_risk_level'], minlength=3)
+
+    return risk_counts
+
+def plan_shards(n_rows, n_shards, shard_by='ward'):
+    """Split the wards (or scenarios) into n_shards pools and give each a proportional row count"""
+    if shard_by == 'ward':
+        pools = [pool for pool in np.array_split(np.arange(len(BASE_WARDS)), n_shards) if len(pool)]
+        shares = np.array([len(pool) for pool in pools], dtype=float)
+    elif shard_by == 'scenario':
+        pools = [pool for pool in np.array_split(np.arange(len(SCENARIOS)), n_shards) if len(pool)]
+        shares = np.array([np.asarray(SCENARIO_WEIGHTS)[pool].sum() for pool in pools])
+    else:
+        raise ValueError(f"Unknown shard_by: {shard_by}")
+
+    # Round the cumulative shares so the counts always sum to n_rows
+    bounds = np.rint(np.cumsum(shares) / shares.sum() * n_rows).astype(np.int64)
+    counts = np.diff(np.concatenate([[0], bounds]))
+    return list(zip(pools, counts.tolist()))
+
+def generate_shard(spec):
+    """Process-pool worker: write one part file and report what it contains"""
+    start = time.perf_counter()
+    by_ward = spec['shard_by'] == 'ward'
+    risk_counts = write_dataset(
+        spec['path'], spec['rows'], seed=spec['seed'], chunk_size=spec['chunk_size'],
+        first_cell_id=spec['first_cell_id'],
+        ward_pool=spec['pool'] if by_ward else None,
+        scenario_pool=None if by_ward else spec['pool']
+    )
+    return {
+        'path': os.path.basename(spec['path']),
+        'rows': spec['rows'],
+        'first_cell_id': spec['first_cell_id'],
+        'wards' if by_ward else 'scenarios': [
+            BASE_WARDS[i][0] if by_ward else SCENARIOS[i] for i in spec['pool']
+        ],
+        'risk_counts': risk_counts.tolist(),
+        'seconds': round(time.perf_counter() - start, 2)
+    }
+
+def write_sharded_dataset(output, n_rows, n_shards, seed=42, chunk_size=250_000,
+                          shard_by='ward', workers=None):
+    """Generate shards in parallel as <stem>.part-NNNNN.csv plus <stem>.manifest.json
+
+    Each shard draws from its own child of SeedSequence(seed), so output does not depend
+    on the number of workers or the order shards finish in.
+    """
+    stem = os.path.splitext(output)[0]
+    plan = plan_shards(n_rows, n_shards, shard_by)
+    seeds = np.random.SeedSequence(seed).spawn(len(plan))
+
+    specs = []
+    first_cell_id = 1000
+    for i, ((pool, rows), shard_seed) in enumerate(zip(plan, seeds)):
+        specs.append({
+            'path': f"{stem}.part-{i:05d}.csv", 'rows': rows, 'pool': pool.tolist(),
+            'shard_by': shard_by, 'seed': shard_seed, 'chunk_size': chunk_size,
+            'first_cell_id': first_cell_id
+        })
+        first_cell_id += rows
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        shards = list(executor.map(generate_shard, specs))
+
+    manifest = {
+        'rows': n_rows,
+        'seed': seed,
+        'shard_by': shard_by,
+        'columns': COLUMNS,
+        'shards': shards
+    }
+    manifest_path = f"{stem}.manifest.json"
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path, manifest
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Generate a large synthetic flood dataset")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="number of records")
+    parser.add_argument('--seed', type=int, default=42, help="seed for reproducible output")
+    parser.add_argument('--chunk-size', type=int, default=250_000, help="rows held in memory at once")
+    parser.add_argument('--output', default=os.path.join(script_dir, 'delhi_flood_data_large.csv'))
+    parser.add_argument('--columnar', action='store_true',
+                        help="also write the .npz copy (loads the full dataset into memory)")
+    parser.add_argument('--shards', type=int, default=0,
+                        help="split into N part files generated in parallel (0 = single file)")
+    parser.add_argument('--shard-by', choices=['ward', 'scenario'], default='ward')
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    print(f"Generating {args.rows:,} flood data records (seed {args.seed})...")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    if args.shards:
+        manifest_path, manifest = write_sharded_dataset(
+            args.output, args.rows, args.shards, args.seed, args.chunk_size,
+            shard_by=args.shard_by, workers=args.workers
+        )
+        risk_counts = np.sum([shard['risk_counts'] for shard in manifest['shards']], axis=0)
+        output = manifest_path
+    else:
+        risk_counts = write_dataset(args.output, args.rows, args.seed, args.chunk_size)
+        output = args.output
+    elapsed = time.perf_counter() - start
+
+    print(f"[SUCCESS] Generated {args.rows:,} records in {elapsed:.1f}s ({args.rows / elapsed:,.0f} rows/s)")
+    print(f"[INFO] File: {output}")
+
+    print(f"\n[STATS] Risk Level Distribution:")
+    for risk, count in enumerate(risk_counts):
+        label = ['Safe', 'Warning', 'Danger'][risk]
+        print(f"   {label} ({risk}): {count:,} ({count / args.rows * 100:.1f}%)")
+
+    if args.columnar:
+        from dataset_io import convert_csv
+        if args.shards:
+            for shard in manifest['shards']:
+                convert_csv(os.path.join(os.path.dirname(output), shard['path']))
+        else:
+            convert_csv(args.output)
+
+if __name__ == '__main__':
+    main()
@@ -238,5 +238,8 @@ if __name__ == '__main__':
     csv_path = os.path.join(script_dir, 'delhi_flood_data.csv')
     append_to_csv(new_records, csv_path)
     
+    from dataset_io import convert_csv
+    convert_csv(csv_path)
+    
     print("\n[SUCCESS] Data generation complete!")
     print("Ready for model training with 100 total records.")
@@ -281,6 +281,9 @@ if __name__ == '__main__':
     
     write_csv(records, csv_path)
     
+    from dataset_io import convert_csv
+    convert_csv(csv_path)
+    
     print(f"[SUCCESS] Generated {len(records)} records")
     print(f"[INFO] File: {csv_path}")
     
@@ -3,19 +3,41 @@ FastAPI Backend for Delhi Flood Risk Prediction
 Provides /predict and /demo endpoints
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 import joblib
 import pandas as pd
 import numpy as np
 import json
 import os
-from typing import Optional, Dict, Any
+import sys
+import asyncio
+import hashlib
+import time
+from typing import Optional, Dict, Any, List, NamedTuple
 import random
 from datetime import datetime, timedelta
 
-app = FastAPI(title="Delhi Drainage & Waterlogging Prediction API")
+from flat_forest import FlatForest
+from prediction_cache import PredictionCache
+from demo_stream import DemoBroadcaster, format_sse
+from inference_executor import InferenceExecutor, InferenceQueueFull
+from request_coalescer import RequestCoalescer
+from cascade_model import CascadeModel
+from risk_surface import RiskSurface
+from fallback_rules import RuleEngine
+from model_registry import ModelEntry, ModelRegistry, UnknownModel, measure_latency
+import metrics
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that records its encoding time as the serialization phase"""
+    def render(self, content: Any) -> bytes:
+        with metrics.timed('serialization'):
+            return super().render(content)
+
+app = FastAPI(title="Delhi Drainage & Waterlogging Prediction API", default_response_class=TimedJSONResponse)
 
 # CORS middleware for React frontend
 app.add_middleware(
@@ -26,33 +48,253 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Per-endpoint latency histogram, labelled by the route template to keep the series bounded"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get('route')
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, request.method,
+                                        route.path if route is not None else 'unmatched', str(status))
+
 # Load model
 import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, 'models', 'random_forest_model.pkl')
+FLAT_MODEL_PATH = os.path.join(BASE_DIR, 'models', 'random_forest_flat.joblib')
+XGB_MODEL_PATH = os.path.join(BASE_DIR, 'models', 'xgboost_model.pkl')
+DISTILLED_MODEL_PATH = os.path.join(BASE_DIR, 'models', 'distilled_tree.joblib')
+RISK_SURFACE_PATH = os.path.join(BASE_DIR, 'models', 'risk_surface.npz')
+TRAINING_REPORT_PATH = os.path.join(BASE_DIR, 'models', 'training_report.json')
 FEATURE_COLS_PATH = os.path.join(BASE_DIR, 'models', 'feature_columns.json')
-DATA_PATH = os.path.join(BASE_DIR, '..', 'DATA', 'delhi_flood_data.csv')
+FALLBACK_RULES_PATH = os.environ.get('FALLBACK_RULES_PATH', os.path.join(BASE_DIR, 'fallback_rules.json'))
+DATA_DIR = os.path.join(BASE_DIR, '..', 'DATA')
+DATA_PATH = os.path.join(DATA_DIR, 'delhi_flood_data.csv')
+
+# Shared columnar dataset loader lives next to the data
+sys.path.insert(0, DATA_DIR)
+from dataset_io import load_dataset, to_float64
+
+# Upper bound on rows accepted by /predict/batch (a full city refresh is ~250 wards)
+MAX_BATCH_ROWS = 1000
+
+RISK_LABELS = ['Safe', 'Warning', 'Danger']
+
+# Model name reported for (and accepted to request) rule-based predictions
+RULES_MODEL = 'rules'
+
+# Static (per-ward) features and the values used when a ward is unknown
+WARD_DEFAULTS = {
+    'distance_to_yamuna_m': 4000.0,
+    'elevation_m': 215.0,
+    'slope_percent': 2.5,
+    'impervious_ratio': 0.75,
+    'drain_density': 0.50,
+    'drain_capacity_score': 0.70,
+    'drain_blockage_risk': 0.55,
+    'flooded_before': 0,
+    'flood_frequency': 1
+}
+WARD_STATIC_COLS = list(WARD_DEFAULTS.keys())
+WARD_INT_COLS = ('flooded_before', 'flood_frequency')
+
+# 'flat' serves the exported array-based forest when present, 'sklearn' the pickled estimator
+MODEL_ENGINE = os.environ.get('MODEL_ENGINE', 'flat')
+
+# Active model: 'fixed' (MODEL_DEFAULT), 'fastest', 'accurate' or 'slo' (most accurate within MODEL_SLO_P99_MS)
+# Unset MODEL_DEFAULT means 'cascade' when a student distilled from the loaded forest exists, else 'random_forest'
+MODEL_DEFAULT = os.environ.get('MODEL_DEFAULT')
+model_registry = ModelRegistry(
+    policy=os.environ.get('MODEL_POLICY', 'fixed'),
+    default_model=MODEL_DEFAULT,
+    slo_p99_ms=float(os.environ.get('MODEL_SLO_P99_MS', 1.0))
+)
+# 'cascade' model: distilled tree first, full forest when its confidence is below this (0 disables)
+CASCADE_CONFIDENCE = float(os.environ.get('CASCADE_CONFIDENCE', 0.8))
+# Per-ward risk surface built by risk_surface.py: '0' ignores it, interpolation off means nearest grid point
+RISK_SURFACE_ENABLED = os.environ.get('RISK_SURFACE', '1') == '1'
+RISK_SURFACE_INTERPOLATE = os.environ.get('RISK_SURFACE_INTERPOLATE', '1') == '1'
+# Degraded mode scores every request with the vectorized rules, never the models; it can also be
+# switched on for the duration of each model reload so a shared CPU goes to loading
+DEGRADED_MODE = os.environ.get('DEGRADED_MODE', '0') == '1'
+DEGRADED_DURING_RELOAD = os.environ.get('DEGRADED_DURING_RELOAD', '0') == '1'
+# One-row calls timed per model at startup
+MODEL_LATENCY_SAMPLES = int(os.environ.get('MODEL_LATENCY_SAMPLES', 100))
+# Hot reload: poll the model artifacts every MODEL_WATCH_SECONDS (0 disables; POST /models/reload always works)
+MODEL_WATCH_SECONDS = float(os.environ.get('MODEL_WATCH_SECONDS', 0))
+
+# Memory-map FlatForest arrays (the flat forest and distilled tree) read-only so uvicorn workers
+# share them via the page cache ('' to disable). The sklearn and XGBoost pickles are not mapped:
+# sklearn copies its tree arrays when unpickling and the booster lives in native memory
+MODEL_MMAP_MODE = os.environ.get('MODEL_MMAP_MODE', 'r') or None
+
+# How to collapse wards that appear in many CSV rows: 'first', 'median' or 'latest'
+WARD_AGGREGATION = os.environ.get('WARD_AGGREGATION', 'first')
+
+# /predict result cache: bucket widths for the dynamic inputs, size 0 disables it
+RAIN_CACHE_STEP_MM = float(os.environ.get('RAIN_CACHE_STEP_MM', 0.5))
+YAMUNA_CACHE_STEP_M = float(os.environ.get('YAMUNA_CACHE_STEP_M', 0.05))
+prediction_cache = PredictionCache(
+    max_size=int(os.environ.get('PREDICTION_CACHE_SIZE', 4096)),
+    ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL_S', 60)),
+    steps={
+        'rain_1h_mm': RAIN_CACHE_STEP_MM,
+        'rain_3h_mm': RAIN_CACHE_STEP_MM,
+        'rain_24h_mm': RAIN_CACHE_STEP_MM,
+        'rain_forecast_3h_mm': RAIN_CACHE_STEP_MM,
+        'yamuna_level_m': YAMUNA_CACHE_STEP_M
+    }
+)
+
+# /demo serves a snapshot of every ward, rebuilt in the background on this tick
+DEMO_REFRESH_SECONDS = float(os.environ.get('DEMO_REFRESH_SECONDS', 3))
+# Wards scored by /demo when no ward data is available
+DEMO_WARDS = ['Karol Bagh', 'Paharganj', 'Lajpat Nagar', 'Dwarka Sector 21',
+              'Connaught Place', 'Rohini Sector 8', 'Vasant Kunj', 'Mayur Vihar Phase 1']
+
+# /demo/stream: per-client queue length and the confidence change that counts as an update.
+# The simulation re-draws per-ward jitter every tick: at 0.05 about 120 of 189 wards moved each
+# tick (~40 KB deltas vs a ~60 KB snapshot); at 0.2 about 30 do (~10 KB), half of them level changes
+DEMO_STREAM_QUEUE_SIZE = int(os.environ.get('DEMO_STREAM_QUEUE_SIZE', 8))
+DEMO_STREAM_CONFIDENCE_DELTA = float(os.environ.get('DEMO_STREAM_CONFIDENCE_DELTA', 0.2))
+DEMO_STREAM_KEEPALIVE_SECONDS = 15
+demo_broadcaster = DemoBroadcaster(queue_size=DEMO_STREAM_QUEUE_SIZE)
+
+class DemoSnapshot(NamedTuple):
+    """Immutable /demo response: replaced as a whole, never mutated"""
+    etag: str
+    body: bytes
+    payload: Dict[str, Any]
 
-model = None
 feature_cols = None
 ward_data = None
+ward_index = None     # ward name -> row offset into ward_features
+ward_features = None  # contiguous (n_wards x len(WARD_STATIC_COLS)) float array
+demo_snapshot = None  # latest DemoSnapshot
+demo_refresh_task = None
+startup_seconds = None  # wall time of the last load_model()
+risk_surface = None   # RiskSurface for the model it was built from, or None
+model_watch_task = None
+model_reload_lock = None  # asyncio.Lock, created on the event loop
+model_reload_stats = {'reloads': 0, 'failures': 0, 'last_reload_seconds': None,
+                      'last_reloaded_at': None, 'last_error': None}
+demo_last_pushed = {}  # ward -> (flood_risk_level, confidence) last sent on /demo/stream
+fallback_engine = RuleEngine.load(FALLBACK_RULES_PATH, len(RISK_LABELS))
+degraded_mode = DEGRADED_MODE
+
+def build_ward_index(df: pd.DataFrame, policy: str = 'first') -> tuple:
+    """Collapse the CSV to one row of static features per ward"""
+    if policy not in ('first', 'median', 'latest'):
+        raise ValueError(f"Unknown ward aggregation policy: {policy}")
+    
+    static = df.reindex(columns=['ward_name'] + WARD_STATIC_COLS)
+    static = static.fillna(WARD_DEFAULTS)
+    if policy == 'latest' and 'cell_id' in df.columns:
+        static = static.loc[df['cell_id'].sort_values(kind='stable').index]
+    
+    grouped = static.groupby('ward_name', sort=True, observed=True)[WARD_STATIC_COLS]
+    if policy == 'median':
+        per_ward = grouped.median()
+    elif policy == 'latest':
+        per_ward = grouped.last()
+    else:
+        per_ward = grouped.first()
+    
+    index = {str(name): offset for offset, name in enumerate(per_ward.index)}
+    features = np.ascontiguousarray(to_float64(per_ward.to_numpy()))
+    return index, features
+
+def load_training_accuracies() -> Dict[str, float]:
+    """Test-set accuracy per model from the last training run, if recorded"""
+    try:
+        with open(TRAINING_REPORT_PATH) as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    accuracies = {name: entry['accuracy'] for name, entry in report.items()
+                  if isinstance(entry, dict) and 'accuracy' in entry}
+    distilled = report.get('distilled')
+    if distilled and distilled.get('cascade'):
+        # Cascade accuracy at the threshold closest to the configured one
+        row = min(distilled['cascade'], key=lambda row: abs(row['threshold'] - CASCADE_CONFIDENCE))
+        accuracies['cascade'] = row['accuracy']
+    return accuracies
+
+def latency_probe_matrix() -> np.ndarray:
+    """Realistic rows for timing the models: dataset rows, else one row of request defaults"""
+    if ward_data is not None:
+        rows = ward_data.reindex(columns=feature_cols).head(MODEL_LATENCY_SAMPLES).fillna(0)
+        return to_float64(rows.to_numpy())
+    features = build_features(PredictionRequest())
+    return np.array([[features.get(col, 0.0) for col in feature_cols]])
+
+def forest_fingerprint(model) -> str:
+    """FlatForest.fingerprint() of the served forest, whether it is the flat export or the sklearn pickle"""
+    if not isinstance(model, FlatForest):
+        model = FlatForest.from_sklearn(model)
+    return model.fingerprint()
+
+def install_model_entries(entries: Dict[str, ModelEntry]) -> Optional[str]:
+    """Swap entries into the registry; without MODEL_DEFAULT the cascade is the default only when loaded"""
+    model_registry.default_model = MODEL_DEFAULT or ('cascade' if 'cascade' in entries else 'random_forest')
+    return model_registry.replace(entries)
+
+def load_model_entries(probe_matrix: np.ndarray) -> Dict[str, ModelEntry]:
+    """Read the model artifacts and warm up/time each one; touches no serving state"""
+    accuracies = load_training_accuracies()
+    loaded = {}
+    if MODEL_ENGINE == 'flat' and os.path.exists(FLAT_MODEL_PATH):
+        model = FlatForest.load(FLAT_MODEL_PATH, mmap_mode=MODEL_MMAP_MODE)
+        loaded['random_forest'] = (model, FLAT_MODEL_PATH)
+        print(f"Flat forest loaded from {FLAT_MODEL_PATH} ({model.n_trees} trees)")
+    elif os.path.exists(MODEL_PATH):
+        loaded['random_forest'] = (joblib.load(MODEL_PATH), MODEL_PATH)
+        print(f"Model loaded from {MODEL_PATH}")
+    else:
+        print(f"Warning: Model not found at {MODEL_PATH}.")
+    
+    if 'random_forest' in loaded and CASCADE_CONFIDENCE > 0 and os.path.exists(DISTILLED_MODEL_PATH):
+        fast_model = FlatForest.load(DISTILLED_MODEL_PATH, mmap_mode=MODEL_MMAP_MODE)
+        teacher = loaded['random_forest'][0]
+        if fast_model.teacher_fingerprint != forest_fingerprint(teacher):
+            print(f"Warning: {DISTILLED_MODEL_PATH} was distilled from a different forest; "
+                  f"not serving the cascade (retrain with --distill)")
+        else:
+            loaded['cascade'] = (CascadeModel(fast_model, teacher, CASCADE_CONFIDENCE), DISTILLED_MODEL_PATH)
+            print(f"Distilled tree loaded from {DISTILLED_MODEL_PATH} (cascade threshold {CASCADE_CONFIDENCE})")
+    
+    if os.path.exists(XGB_MODEL_PATH):
+        try:
+            loaded['xgboost'] = (joblib.load(XGB_MODEL_PATH), XGB_MODEL_PATH)
+            print(f"Model loaded from {XGB_MODEL_PATH}")
+        except Exception as e:
+            print(f"Warning: Could not load XGBoost model: {e}")
+    
+    entries = {}
+    for name, (model, path) in loaded.items():
+        p50_ms, p99_ms = measure_latency(model, probe_matrix, MODEL_LATENCY_SAMPLES)
+        if isinstance(model, CascadeModel):
+            model.reset_stats()  # count real traffic only
+        entries[name] = ModelEntry(model, path, accuracies.get(name), p50_ms, p99_ms)
+        print(f"Model {name}: p50 {p50_ms} ms, p99 {p99_ms} ms, accuracy {accuracies.get(name)}")
+    return entries
 
 def load_model():
-    """Load trained model and feature columns"""
-    global model, feature_cols, ward_data
+    """Load trained models and feature columns"""
+    global feature_cols, ward_data, ward_index, ward_features, startup_seconds, risk_surface
+    started = time.perf_counter()
+    load_fallback_rules()
     
     # Ensure models directory exists
     models_dir = os.path.dirname(MODEL_PATH)
     if not os.path.exists(models_dir):
         os.makedirs(models_dir, exist_ok=True)
     
-    if os.path.exists(MODEL_PATH):
-        model = joblib.load(MODEL_PATH)
-        print(f"Model loaded from {MODEL_PATH}")
-    else:
-        print(f"Warning: Model not found at {MODEL_PATH}. Using fallback predictions.")
-        model = None
-    
     if os.path.exists(FEATURE_COLS_PATH):
         with open(FEATURE_COLS_PATH, 'r') as f:
             feature_cols = json.load(f)
@@ -69,16 +311,204 @@ def load_model():
     # Load ward data for reference
     if os.path.exists(DATA_PATH):
         try:
-            ward_data = pd.read_csv(DATA_PATH)
+            ward_data = load_dataset(DATA_PATH)
             print(f"Ward data loaded: {len(ward_data)} records")
+            ward_index, ward_features = build_ward_index(ward_data, WARD_AGGREGATION)
+            print(f"Ward index built: {len(ward_index)} wards ({WARD_AGGREGATION})")
         except Exception as e:
             print(f"Warning: Could not load ward data: {e}")
             ward_data = None
+            ward_index, ward_features = None, None
+    
+    active = install_model_entries(load_model_entries(latency_probe_matrix()))
+    if active is None:
+        print("Warning: No models loaded. Using fallback predictions.")
+    else:
+        print(f"Active model: {active} (policy: {model_registry.policy})")
+    
+    risk_surface = load_risk_surface()
+    
+    # Cached results belong to the previous model/ward data
+    prediction_cache.clear()
+    
+    startup_seconds = time.perf_counter() - started
+    print(f"Startup load took {startup_seconds * 1000:.1f} ms")
+
+def load_fallback_rules():
+    """Re-read the fallback thresholds; a broken config keeps the rules already loaded"""
+    global fallback_engine
+    try:
+        fallback_engine = RuleEngine.load(FALLBACK_RULES_PATH, len(RISK_LABELS))
+    except Exception as e:
+        print(f"Warning: Could not load fallback rules from {FALLBACK_RULES_PATH}: {e}")
+
+def model_artifact_signature(model_name: str) -> Optional[List[int]]:
+    """Size and mtime of every artifact a registry model depends on, to tie a risk surface to exact files
+
+    The cascade depends on the forest as well as its student, and every model on the feature columns.
+    """
+    models = model_registry.stats()['models']
+    info = models.get(model_name)
+    if not info or not info['path']:
+        return None
+    paths = [info['path']]
+    if model_name == 'cascade' and 'random_forest' in models:
+        paths.append(models['random_forest']['path'])
+    paths.append(FEATURE_COLS_PATH)
+    signature = []
+    for path in paths:
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        signature.extend([stat.st_size, stat.st_mtime_ns])
+    return signature
+
+def load_risk_surface() -> Optional[RiskSurface]:
+    """The prebuilt risk surface if it still matches the loaded model and features"""
+    if not RISK_SURFACE_ENABLED or not os.path.exists(RISK_SURFACE_PATH):
+        return None
+    try:
+        surface = RiskSurface.load(RISK_SURFACE_PATH, interpolate=RISK_SURFACE_INTERPOLATE)
+    except Exception as e:
+        print(f"Warning: Could not load risk surface: {e}")
+        return None
+    if surface.feature_cols != feature_cols or surface.model_signature != model_artifact_signature(surface.model_name):
+        print(f"Warning: Risk surface at {RISK_SURFACE_PATH} is stale (model or features changed); ignoring it")
+        return None
+    print(f"Risk surface loaded: {surface.bins}^5 grid, {len(surface.wards)} wards, "
+          f"{surface.nbytes / 1e6:.1f} MB ({surface.model_name})")
+    return surface
+
+def reload_models() -> Dict[str, Any]:
+    """Load and warm the current artifacts off to the side, then swap them in with one assignment
+
+    Requests that already fetched a model finish on it; ward data and feature columns are kept.
+    Process workers hold their own copies, so a fresh pool loads and warms the new artifacts
+    first: the parent never hands a worker a model name it has not loaded. If anything fails
+    before the swap, the previous models and workers keep serving.
+    """
+    global risk_surface
+    started = time.perf_counter()
+    load_fallback_rules()
+    entries = load_model_entries(latency_probe_matrix())
+    if not entries:
+        raise FileNotFoundError(f"No model artifacts found in {os.path.dirname(MODEL_PATH)}")
+    surface = load_risk_surface()
+    inference_executor.restart()
+    swap_started = time.perf_counter()
+    active = install_model_entries(entries)
+    risk_surface = surface
+    prediction_cache.clear()
+    finished = time.perf_counter()
+    return {
+        'active': active,
+        'models': sorted(entries),
+        'reload_seconds': round(finished - started, 4),
+        'swap_ms': round((finished - swap_started) * 1000, 4)
+    }
+
+def process_memory() -> Dict[str, Optional[float]]:
+    """Current and peak resident set size of this worker in MB"""
+    rss_mb = None
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    rss_mb = round(int(line.split()[1]) / 1024, 1)
+                    break
+    except OSError:
+        pass
+    
+    try:
+        import resource
+        peak_rss_mb = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:  # Windows
+        peak_rss_mb = None
+    
+    return {'rss_mb': rss_mb, 'peak_rss_mb': peak_rss_mb}
+
+def warm_up_worker():
+    """One prediction through the active model, so a fresh pool worker serves its first request warm"""
+    make_batch_prediction([build_features(PredictionRequest())])
+
+# Inference runs on its own pool: 'thread' (default) or 'process' (each worker loads the model)
+inference_executor = InferenceExecutor(
+    mode=os.environ.get('INFERENCE_EXECUTOR', 'thread'),
+    workers=int(os.environ.get('INFERENCE_WORKERS', 0)) or None,
+    max_concurrency=int(os.environ.get('INFERENCE_MAX_CONCURRENCY', 0)) or None,
+    max_queue=int(os.environ.get('INFERENCE_MAX_QUEUE', 256)),
+    initializer=load_model,
+    warmup=warm_up_worker
+)
+
+async def run_model_reload(trigger: str) -> Dict[str, Any]:
+    """reload_models on a worker thread (one reload at a time) while requests keep being served"""
+    global model_reload_lock
+    if model_reload_lock is None:
+        model_reload_lock = asyncio.Lock()
+    async with model_reload_lock:
+        try:
+            report = await asyncio.to_thread(reload_models)
+        except Exception as e:
+            model_reload_stats['failures'] += 1
+            model_reload_stats['last_error'] = str(e)
+            print(f"Model reload ({trigger}) failed, still serving the previous models: {e}")
+            raise
+        model_reload_stats['reloads'] += 1
+        model_reload_stats['last_reload_seconds'] = report['reload_seconds']
+        model_reload_stats['last_reloaded_at'] = datetime.now().isoformat()
+        model_reload_stats['last_error'] = None
+        print(f"Models reloaded ({trigger}) in {report['reload_seconds'] * 1000:.1f} ms, active: {report['active']}")
+        return {'trigger': trigger, **report}
+
+def artifact_signature() -> tuple:
+    """Size and mtime of every model artifact the API reads"""
+    signature = []
+    for path in (FLAT_MODEL_PATH, MODEL_PATH, XGB_MODEL_PATH, DISTILLED_MODEL_PATH, RISK_SURFACE_PATH,
+                 TRAINING_REPORT_PATH):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+async def model_watch_loop():
+    """Reload once the artifacts have changed and then stayed the same for a full tick"""
+    current = artifact_signature()
+    pending = None
+    while True:
+        await asyncio.sleep(MODEL_WATCH_SECONDS)
+        signature = artifact_signature()
+        if signature == current:
+            pending = None
+            continue
+        if signature != pending:
+            # Training may still be writing the other artifacts
+            pending = signature
+            continue
+        try:
+            await run_model_reload('watcher')
+        except Exception:
+            pass
+        current, pending = signature, None
 
 # Load on startup
 @app.on_event("startup")
 async def startup_event():
+    global demo_refresh_task, model_watch_task
     load_model()
+    demo_refresh_task = asyncio.create_task(demo_refresh_loop())
+    if MODEL_WATCH_SECONDS > 0:
+        model_watch_task = asyncio.create_task(model_watch_loop())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if demo_refresh_task is not None:
+        demo_refresh_task.cancel()
+    if model_watch_task is not None:
+        model_watch_task.cancel()
+    inference_executor.shutdown()
 
 # Request models
 class PredictionRequest(BaseModel):
@@ -98,106 +528,319 @@ class PredictionRequest(BaseModel):
     drain_blockage_risk: Optional[float] = None
     flooded_before: Optional[int] = None
     flood_frequency: Optional[int] = None
+    # Registry model to use instead of the active one, e.g. 'xgboost'
+    model: Optional[str] = None
+
+class BatchPredictionRequest(BaseModel):
+    rows: List[PredictionRequest]
+    model: Optional[str] = None
+
+class ModelSelectionRequest(BaseModel):
+    # Either an explicit model name or a policy to re-run
+    model: Optional[str] = None
+    policy: Optional[str] = None
+
+class DegradedModeRequest(BaseModel):
+    enabled: bool
 
 def get_ward_defaults(ward_name: str) -> Dict[str, float]:
-    """Get default values for a ward from CSV data"""
-    defaults = {
-        'distance_to_yamuna_m': 4000.0,
-        'elevation_m': 215.0,
-        'slope_percent': 2.5,
-        'impervious_ratio': 0.75,
-        'drain_density': 0.50,
-        'drain_capacity_score': 0.70,
-        'drain_blockage_risk': 0.55,
-        'flooded_before': 0,
-        'flood_frequency': 1
-    }
+    """Get default values for a ward from the precomputed ward index"""
+    defaults = dict(WARD_DEFAULTS)
     
-    if ward_data is not None and ward_name:
-        ward_row = ward_data[ward_data['ward_name'] == ward_name]
-        if not ward_row.empty:
-            row = ward_row.iloc[0]
-            defaults.update({
-                'distance_to_yamuna_m': float(row.get('distance_to_yamuna_m', defaults['distance_to_yamuna_m'])),
-                'elevation_m': float(row.get('elevation_m', defaults['elevation_m'])),
-                'slope_percent': float(row.get('slope_percent', defaults['slope_percent'])),
-                'impervious_ratio': float(row.get('impervious_ratio', defaults['impervious_ratio'])),
-                'drain_density': float(row.get('drain_density', defaults['drain_density'])),
-                'drain_capacity_score': float(row.get('drain_capacity_score', defaults['drain_capacity_score'])),
-                'drain_blockage_risk': float(row.get('drain_blockage_risk', defaults['drain_blockage_risk'])),
-                'flooded_before': int(row.get('flooded_before', defaults['flooded_before'])),
-                'flood_frequency': int(row.get('flood_frequency', defaults['flood_frequency']))
-            })
+    if ward_index is not None and ward_name:
+        offset = ward_index.get(ward_name)
+        if offset is not None:
+            defaults.update(zip(WARD_STATIC_COLS, ward_features[offset].tolist()))
+            for col in WARD_INT_COLS:
+                defaults[col] = int(round(defaults[col]))
     
     return defaults
 
-def make_prediction(features: Dict[str, float]) -> Dict[str, Any]:
-    """Make prediction using ML model or fallback logic"""
+def build_features(request: PredictionRequest) -> Dict[str, float]:
+    """Build the model feature dictionary for a request, filling gaps from ward defaults"""
+    # Get ward defaults if ward_name provided
+    with metrics.timed('ward_lookup'):
+        defaults = get_ward_defaults(request.ward_name) if request.ward_name else {}
+    
+    with metrics.timed('feature_assembly'):
+        return {
+            'distance_to_yamuna_m': request.distance_to_yamuna_m or defaults.get('distance_to_yamuna_m', 4000.0),
+            'rain_1h_mm': request.rain_1h_mm,
+            'rain_3h_mm': request.rain_3h_mm,
+            'rain_24h_mm': request.rain_24h_mm,
+            'rain_forecast_3h_mm': request.rain_forecast_3h_mm,
+            'elevation_m': request.elevation_m or defaults.get('elevation_m', 215.0),
+            'slope_percent': request.slope_percent or defaults.get('slope_percent', 2.5),
+            'impervious_ratio': request.impervious_ratio or defaults.get('impervious_ratio', 0.75),
+            'drain_density': request.drain_density or defaults.get('drain_density', 0.50),
+            'drain_capacity_score': request.drain_capacity_score or defaults.get('drain_capacity_score', 0.70),
+            'drain_blockage_risk': request.drain_blockage_risk or defaults.get('drain_blockage_risk', 0.55),
+            'yamuna_level_m': request.yamuna_level_m,
+            'flooded_before': request.flooded_before if request.flooded_before is not None else defaults.get('flooded_before', 0),
+            'flood_frequency': request.flood_frequency if request.flood_frequency is not None else defaults.get('flood_frequency', 1),
+            'citizen_reports_count': defaults.get('citizen_reports_count', 0),
+            'avg_reported_depth_cm': defaults.get('avg_reported_depth_cm', 0),
+            'max_flood_depth_cm': 0  # Will be calculated
+        }
+
+def is_degraded() -> bool:
+    """Rules only: degraded mode is on, or a model reload is running with DEGRADED_DURING_RELOAD"""
+    reload_lock = model_reload_lock
+    return degraded_mode or (DEGRADED_DURING_RELOAD and reload_lock is not None and reload_lock.locked())
+
+def resolve_model_name(model_name: Optional[str] = None) -> str:
+    """The model a request is scored with: RULES_MODEL when asked for or degraded, else the registry's choice"""
+    if model_name == RULES_MODEL or is_degraded():
+        return RULES_MODEL
+    return model_registry.resolve(model_name)
+
+def serving_model(model_name: Optional[str] = None) -> tuple:
+    """(name, model) for a request; the model is None when the rules should answer
+
+    The name was resolved on the event loop; if a reload dropped that model since, the
+    request is served by the active model instead of failing.
+    """
+    if model_name == RULES_MODEL or is_degraded():
+        return RULES_MODEL, None
+    return model_registry.checkout(model_name)
+
+def model_probabilities(model, feature_matrix: np.ndarray, model_name: Optional[str] = None) -> np.ndarray:
+    """Run a single inference pass and return per-class probabilities aligned to RISK_LABELS"""
+    with metrics.timed('model_inference'):
+        if hasattr(model, 'predict_proba'):
+            class_probs = model.predict_proba(feature_matrix)
+            classes = model.classes_
+        else:
+            # No probabilities available: one-hot the predicted class
+            classes = np.arange(len(RISK_LABELS))
+            predicted = np.asarray(model.predict(feature_matrix)).astype(int)
+            class_probs = (predicted[:, None] == classes).astype(float)
+    label = model_name or type(model).__name__
+    metrics.MODEL_CALLS.inc(1, label)
+    metrics.MODEL_ROWS.inc(len(feature_matrix), label)
+    
+    # Align to [Safe, Warning, Danger] even if a class was absent from training
+    probabilities = np.zeros((len(feature_matrix), len(RISK_LABELS)))
+    probabilities[:, np.asarray(classes, dtype=int)] = class_probs
+    return probabilities
+
+def predict_risk(model, feature_matrix: np.ndarray, model_name: Optional[str] = None,
+                 wards: Optional[List[str]] = None) -> tuple:
+    """Return (risk_levels, per-class probabilities); rows on model_name's risk surface skip the model
+
+    wards names the ward of each row, for callers whose rows perturb a ward's static inputs
+    """
+    surface = risk_surface
+    if surface is not None and model_name == surface.model_name:
+        with metrics.timed('risk_surface'):
+            hit, surface_probabilities = surface.lookup(feature_matrix, wards)
+        if hit.any():
+            probabilities = np.empty((len(feature_matrix), len(RISK_LABELS)))
+            probabilities[hit] = surface_probabilities
+            if not hit.all():
+                # Unknown static features or inputs outside the grid: score with the model
+                probabilities[~hit] = model_probabilities(model, feature_matrix[~hit], model_name)
+            return probabilities.argmax(axis=1), probabilities
+    
+    probabilities = model_probabilities(model, feature_matrix, model_name)
+    return probabilities.argmax(axis=1), probabilities
+
+def make_prediction(features: Dict[str, float], model_name: Optional[str] = None) -> Dict[str, Any]:
+    """Make prediction using ML model (the active one unless model_name is given) or fallback logic"""
+    model_name, model = serving_model(model_name)
     
     if model is not None and feature_cols:
         try:
             # Prepare feature vector
             feature_vector = np.array([[features.get(col, 0.0) for col in feature_cols]])
             
-            # Predict
-            risk_level = int(model.predict(feature_vector)[0])
-            probabilities = model.predict_proba(feature_vector)[0] if hasattr(model, 'predict_proba') else [0.33, 0.33, 0.34]
-            confidence = float(max(probabilities))
+            # Predict (one probability pass; the class is its argmax)
+            risk_levels, probabilities = predict_risk(model, feature_vector, model_name)
+            return format_prediction(features, int(risk_levels[0]), probabilities[0], model_name)
         except Exception as e:
             print(f"Model prediction error: {e}. Using fallback.")
-            risk_level, confidence = fallback_prediction(features)
-    else:
-        risk_level, confidence = fallback_prediction(features)
     
+    risk_level, confidence = fallback_prediction(features)
+    return format_prediction(features, risk_level, fallback_probabilities(risk_level, confidence), RULES_MODEL)
+
+async def run_prediction(features: Dict[str, float], model_name: Optional[str] = None) -> Dict[str, Any]:
+    """make_prediction on the inference executor, coalesced with concurrent calls when enabled"""
+    if request_coalescer is not None:
+        return await request_coalescer.submit((features, model_name))
+    return await inference_executor.run(make_prediction, features, model_name)
+
+async def cached_prediction(ward_name: Optional[str], features: Dict[str, float],
+                            model_name: Optional[str] = None) -> Dict[str, Any]:
+    """run_prediction behind the quantized LRU/TTL result cache"""
+    # Resolve here so the name reaches process workers and cache entries never mix models
+    model_name = resolve_model_name(model_name)
+    if not prediction_cache.enabled:
+        return await run_prediction(features, model_name)
+    
+    # Generations are read before inference: a result from models (or process workers) replaced
+    # mid-flight is stored under the old generation and never served after the swap
+    key = (model_registry.generation, inference_executor.generation, model_name,
+           prediction_cache.make_key(ward_name, features, feature_cols))
+    result = prediction_cache.get(key)
+    if result is None:
+        result = await run_prediction(features, model_name)
+        prediction_cache.put(key, result)
+    return result
+
+def make_batch_prediction(features_list: List[Dict[str, float]], model_name: Optional[str] = None,
+                          wards: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Score many feature rows with a single model call over one 2-D matrix
+
+    wards (one name per row) lets the risk surface address rows by ward, see predict_risk
+    """
+    if not features_list:
+        return []
+    
+    model_name, model = serving_model(model_name)
+    if model is not None and feature_cols:
+        try:
+            # One (n_rows x n_features) matrix -> one forest traversal for the whole batch
+            feature_matrix = np.array(
+                [[features.get(col, 0.0) for col in feature_cols] for features in features_list],
+                dtype=float
+            )
+            risk_levels, probabilities = predict_risk(model, feature_matrix, model_name, wards)
+            return format_predictions(features_list, risk_levels, probabilities, model_name)
+        except Exception as e:
+            print(f"Batch model prediction error: {e}. Using per-row path.")
+            return [make_prediction(features, model_name) for features in features_list]
+    
+    return fallback_batch_prediction(features_list)
+
+def make_coalesced_prediction(items: List[tuple]) -> List[Dict[str, Any]]:
+    """Score coalesced (features, model_name) items with one batch call per model"""
+    results = [None] * len(items)
+    by_model = {}
+    for i, (_, model_name) in enumerate(items):
+        by_model.setdefault(model_name, []).append(i)
+    for model_name, positions in by_model.items():
+        batch = make_batch_prediction([items[i][0] for i in positions], model_name)
+        for i, result in zip(positions, batch):
+            results[i] = result
+    return results
+
+# Opt-in micro-batching of concurrent /predict calls into one model call
+PREDICT_COALESCE = os.environ.get('PREDICT_COALESCE', '0') == '1'
+request_coalescer = RequestCoalescer(
+    batch_fn=make_coalesced_prediction,
+    run_fn=inference_executor.run,
+    max_wait_ms=float(os.environ.get('COALESCE_MAX_WAIT_MS', 2)),
+    max_batch=int(os.environ.get('COALESCE_MAX_BATCH', 64))
+) if PREDICT_COALESCE else None
+
+def format_prediction(features: Dict[str, float], risk_level: int, probabilities,
+                      model_name: Optional[str] = None) -> Dict[str, Any]:
+    """Build the prediction response fields for one row"""
     # Calculate additional metrics
-    max_depth = calculate_flood_depth(features, risk_level)
+    with metrics.timed('depth_calculation'):
+        max_depth = calculate_flood_depth(features, risk_level)
     
     return {
         'flood_risk_level': risk_level,
-        'risk_label': ['Safe', 'Warning', 'Danger'][risk_level],
-        'confidence': confidence,
+        'risk_label': RISK_LABELS[risk_level],
+        'confidence': float(probabilities[risk_level]),
+        'probabilities': {label: float(p) for label, p in zip(RISK_LABELS, probabilities)},
+        'model': model_name,
         'max_flood_depth_cm': max_depth,
         'drain_capacity_score': features.get('drain_capacity_score', 0.7),
         'citizen_reports_count': int(features.get('citizen_reports_count', 0))
     }
 
+def format_predictions(features_list: List[Dict[str, float]], risk_levels: np.ndarray,
+                       probabilities: np.ndarray, model_name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """format_prediction for a whole batch: depths and confidences computed as arrays"""
+    with metrics.timed('depth_calculation'):
+        depths = calculate_flood_depths(*depth_inputs(features_list), risk_levels)
+    confidences = probabilities[np.arange(len(risk_levels)), risk_levels]
+    
+    return [
+        {
+            'flood_risk_level': risk_level,
+            'risk_label': RISK_LABELS[risk_level],
+            'confidence': confidence,
+            'probabilities': dict(zip(RISK_LABELS, row_probabilities)),
+            'model': model_name,
+            'max_flood_depth_cm': depth,
+            'drain_capacity_score': features.get('drain_capacity_score', 0.7),
+            'citizen_reports_count': int(features.get('citizen_reports_count', 0))
+        }
+        for features, risk_level, confidence, row_probabilities, depth in zip(
+            features_list, risk_levels.tolist(), confidences.tolist(), probabilities.tolist(), depths.tolist()
+        )
+    ]
+
 def fallback_prediction(features: Dict[str, float]) -> tuple:
-    """Fallback prediction logic when model is not available"""
-    rain_24h = features.get('rain_24h_mm', 0)
-    yamuna = features.get('yamuna_level_m', 203.5)
-    blockage = features.get('drain_blockage_risk', 0.5)
-    
-    # Simple rule-based prediction
-    if rain_24h > 80 or yamuna > 204.5 or blockage > 0.75:
-        return (2, 0.85)  # Danger
-    elif rain_24h > 50 or yamuna > 204.0 or blockage > 0.60:
-        return (1, 0.75)  # Warning
-    else:
-        return (0, 0.70)  # Safe
+    """Fallback prediction logic when model is not available (thresholds from fallback_rules.json)"""
+    metrics.FALLBACK_PREDICTIONS.inc()
+    return fallback_engine.predict_one(features)
 
-def calculate_flood_depth(features: Dict[str, float], risk_level: int) -> float:
-    """Estimate flood depth based on risk level and conditions"""
-    base_depth = features.get('rain_24h_mm', 0) * 0.5
-    yamuna_factor = max(0, (features.get('yamuna_level_m', 203.5) - 203.0) * 10)
-    blockage_factor = features.get('drain_blockage_risk', 0.5) * 30
+def fallback_batch_prediction(features_list: List[Dict[str, float]]) -> List[Dict[str, Any]]:
+    """Score a whole batch with the rules as NumPy masks; a city-wide refresh is one pass"""
+    metrics.FALLBACK_PREDICTIONS.inc(len(features_list))
+    engine = fallback_engine
+    risk_levels, confidences = engine.predict_batch(features_list)
+    return format_predictions(features_list, risk_levels, engine.probabilities(risk_levels, confidences), RULES_MODEL)
+
+def fallback_probabilities(risk_level: int, confidence: float) -> List[float]:
+    """Spread the rule-based confidence into a per-class vector"""
+    probabilities = [(1.0 - confidence) / (len(RISK_LABELS) - 1)] * len(RISK_LABELS)
+    probabilities[risk_level] = confidence
+    return probabilities
+
+# Inputs to the depth estimate and their values when a row lacks them
+DEPTH_DEFAULTS = {'rain_24h_mm': 0.0, 'yamuna_level_m': 203.5, 'drain_blockage_risk': 0.5}
+# Depth range per risk level (Safe, Warning, Danger); every depth is capped at 100cm
+DEPTH_FLOOR_CM = np.array([-np.inf, 10.0, 40.0])
+DEPTH_CEILING_CM = np.array([10.0, 40.0, 100.0])
+# The same ranges as plain floats for the single-row path
+DEPTH_RANGES_CM = list(zip(DEPTH_FLOOR_CM.tolist(), DEPTH_CEILING_CM.tolist()))
+
+def depth_inputs(features_list: List[Dict[str, float]]) -> tuple:
+    """(rain_24h, yamuna_level, blockage) arrays for calculate_flood_depths"""
+    return tuple(
+        np.array([features.get(col, default) for features in features_list], dtype=float)
+        for col, default in DEPTH_DEFAULTS.items()
+    )
+
+def calculate_flood_depths(rain_24h, yamuna_level, blockage, risk_levels) -> np.ndarray:
+    """Estimate flood depth for many rows at once based on risk level and conditions"""
+    base_depth = np.asarray(rain_24h, dtype=float) * 0.5
+    yamuna_factor = np.maximum(0.0, (np.asarray(yamuna_level, dtype=float) - 203.0) * 10)
+    blockage_factor = np.asarray(blockage, dtype=float) * 30
     
     depth = base_depth + yamuna_factor + blockage_factor
     
-    # Cap based on risk level
-    if risk_level == 2:
-        depth = max(depth, 40.0)
-    elif risk_level == 1:
-        depth = min(max(depth, 10.0), 40.0)
-    else:
-        depth = min(depth, 10.0)
+    # Cap based on risk level, then at 100cm
+    risk_levels = np.asarray(risk_levels)
+    return np.minimum(np.maximum(depth, DEPTH_FLOOR_CM[risk_levels]), DEPTH_CEILING_CM[risk_levels])
+
+def calculate_flood_depth(features: Dict[str, float], risk_level: int) -> float:
+    """Estimate flood depth based on risk level and conditions
+
+    Scalar twin of calculate_flood_depths (same operations in the same order, so the results are
+    identical): a one-row NumPy call costs about 10x more on the /predict path.
+    """
+    rain_24h, yamuna_level, blockage = (features.get(col, default) for col, default in DEPTH_DEFAULTS.items())
+    base_depth = rain_24h * 0.5
+    yamuna_factor = max(0.0, (yamuna_level - 203.0) * 10)
+    blockage_factor = blockage * 30
     
-    return min(depth, 100.0)  # Cap at 100cm
+    depth = base_depth + yamuna_factor + blockage_factor
+    
+    # Cap based on risk level, then at 100cm
+    floor, ceiling = DEPTH_RANGES_CM[risk_level]
+    return float(min(max(depth, floor), ceiling))
 
 @app.get("/")
 def root():
     return {
         "message": "Delhi Drainage & Waterlogging Prediction API",
-        "endpoints": ["/predict", "/demo", "/health"],
+        "endpoints": ["/predict", "/predict/batch", "/demo", "/demo/stream", "/models", "/health", "/metrics"],
         "status": "operational"
     }
 
@@ -205,40 +848,45 @@ def root():
 def health():
     return {
         "status": "healthy",
-        "model_loaded": model is not None,
-        "features_count": len(feature_cols) if feature_cols else 0
+        "model_loaded": len(model_registry) > 0,
+        "models": model_registry.stats(),
+        "model_reload": model_reload_stats,
+        "degraded_mode": is_degraded(),
+        "risk_surface": risk_surface.stats() if risk_surface is not None else None,
+        "cascade": model_registry.get('cascade').stats() if 'cascade' in model_registry else None,
+        "features_count": len(feature_cols) if feature_cols else 0,
+        "startup_seconds": round(startup_seconds, 4) if startup_seconds is not None else None,
+        "worker_pid": os.getpid(),
+        "memory": process_memory(),
+        "prediction_cache": prediction_cache.stats(),
+        "demo_stream": demo_broadcaster.stats(),
+        "inference": inference_executor.stats(),
+        "coalescer": request_coalescer.stats() if request_coalescer is not None else None
+    }
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Latency histograms, model and fallback call counts in the Prometheus text format"""
+    cache = prediction_cache.stats()
+    inference = inference_executor.stats()
+    gauges = {
+        'flood_models_loaded': ("Models in the registry", len(model_registry)),
+        'flood_degraded_mode': ("1 while predictions come from the rules only", int(is_degraded())),
+        'flood_prediction_cache_hits': ("Prediction cache hits", cache['hits']),
+        'flood_prediction_cache_misses': ("Prediction cache misses", cache['misses']),
+        'flood_inference_in_flight': ("Inference calls running", inference['in_flight']),
+        'flood_inference_queue_depth': ("Inference calls waiting for a slot", inference['queue_depth'])
     }
+    return PlainTextResponse(metrics.render(gauges), media_type='text/plain; version=0.0.4')
 
 @app.post("/predict")
-def predict(request: PredictionRequest):
+async def predict(request: PredictionRequest):
     """Predict flood risk for given conditions"""
     try:
-        # Get ward defaults if ward_name provided
-        defaults = get_ward_defaults(request.ward_name) if request.ward_name else {}
-        
-        # Build feature dictionary
-        features = {
-            'distance_to_yamuna_m': request.distance_to_yamuna_m or defaults.get('distance_to_yamuna_m', 4000.0),
-            'rain_1h_mm': request.rain_1h_mm,
-            'rain_3h_mm': request.rain_3h_mm,
-            'rain_24h_mm': request.rain_24h_mm,
-            'rain_forecast_3h_mm': request.rain_forecast_3h_mm,
-            'elevation_m': request.elevation_m or defaults.get('elevation_m', 215.0),
-            'slope_percent': request.slope_percent or defaults.get('slope_percent', 2.5),
-            'impervious_ratio': request.impervious_ratio or defaults.get('impervious_ratio', 0.75),
-            'drain_density': request.drain_density or defaults.get('drain_density', 0.50),
-            'drain_capacity_score': request.drain_capacity_score or defaults.get('drain_capacity_score', 0.70),
-            'drain_blockage_risk': request.drain_blockage_risk or defaults.get('drain_blockage_risk', 0.55),
-            'yamuna_level_m': request.yamuna_level_m,
-            'flooded_before': request.flooded_before if request.flooded_before is not None else defaults.get('flooded_before', 0),
-            'flood_frequency': request.flood_frequency if request.flood_frequency is not None else defaults.get('flood_frequency', 1),
-            'citizen_reports_count': defaults.get('citizen_reports_count', 0),
-            'avg_reported_depth_cm': defaults.get('avg_reported_depth_cm', 0),
-            'max_flood_depth_cm': 0  # Will be calculated
-        }
+        features = build_features(request)
         
         # Make prediction
-        result = make_prediction(features)
+        result = await cached_prediction(request.ward_name, features, request.model)
         
         return {
             "success": True,
@@ -251,12 +899,81 @@ def predict(request: PredictionRequest):
             }
         }
         
+    except UnknownModel as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Server busy: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
-@app.get("/demo")
-def demo():
-    """Return demo data for live simulation"""
+@app.post("/predict/batch")
+async def predict_batch(request: BatchPredictionRequest):
+    """Predict flood risk for many wards/conditions in one model call"""
+    if len(request.rows) > MAX_BATCH_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.rows)} rows (max {MAX_BATCH_ROWS})"
+        )
+    
+    try:
+        features_list = [build_features(row) for row in request.rows]
+        model_name = resolve_model_name(request.model)
+        results = await inference_executor.run(make_batch_prediction, features_list, model_name)
+        
+        return {
+            "success": True,
+            "count": len(results),
+            "predictions": [
+                {"ward_name": row.ward_name or "Unknown", **result}
+                for row, result in zip(request.rows, results)
+            ]
+        }
+        
+    except UnknownModel as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Server busy: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction error: {str(e)}")
+
+@app.get("/models")
+def list_models():
+    """Loaded models with their startup latency, accuracy and the active selection"""
+    return model_registry.stats()
+
+@app.post("/models/active")
+def select_model(request: ModelSelectionRequest):
+    """Switch the active model by name or policy; models stay loaded, nothing is re-read"""
+    try:
+        if request.model is not None:
+            model_registry.set_active(request.model)
+        else:
+            model_registry.select(request.policy)
+    except UnknownModel as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return model_registry.stats()
+
+@app.post("/models/degraded")
+def set_degraded_mode(request: DegradedModeRequest):
+    """Serve every prediction from the rules (enabled) or go back to the models"""
+    global degraded_mode
+    # Cache entries are keyed by model name, so rule and model results never mix
+    degraded_mode = request.enabled
+    return {"degraded_mode": is_degraded(), "fallback_rules": fallback_engine.stats()}
+
+@app.post("/models/reload")
+async def reload_model_artifacts():
+    """Load new artifacts in the background and swap them in; on failure the old models keep serving"""
+    try:
+        report = await run_model_reload('api')
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {str(e)}")
+    return {"success": True, **report, "registry": model_registry.stats()}
+
+def build_demo_payload() -> Dict[str, Any]:
+    """Simulate current monsoon conditions and score every known ward in one batch"""
     # Simulate dynamic conditions
     base_time = datetime.now()
     
@@ -272,35 +989,45 @@ def demo():
     yamuna_base = 203.0
     yamuna_level = yamuna_base + (rain_24h / 100) * 2 + random.uniform(-0.2, 0.5)
     
-    # Generate ward-specific predictions
-    ward_predictions = {}
-    wards = ['Karol Bagh', 'Paharganj', 'Lajpat Nagar', 'Dwarka Sector 21', 
-             'Connaught Place', 'Rohini Sector 8', 'Vasant Kunj', 'Mayur Vihar Phase 1']
+    # Generate ward-specific predictions for every ward in the dataset
+    wards = list(ward_index.keys()) if ward_index else DEMO_WARDS
+    n_wards = len(wards)
+    rain_1h_jitter = np.random.uniform(-3, 3, n_wards)
+    rain_3h_jitter = np.random.uniform(-5, 5, n_wards)
+    rain_24h_jitter = np.random.uniform(-10, 10, n_wards)
+    blockage_jitter = np.random.uniform(-0.1, 0.1, n_wards)
+    reports_jitter = np.random.uniform(0, 3, n_wards)
     
-    for ward in wards:
+    features_list = []
+    for i, ward in enumerate(wards):
         defaults = get_ward_defaults(ward)
-        features = {
+        features_list.append({
             **defaults,
-            'rain_1h_mm': rain_1h + random.uniform(-3, 3),
-            'rain_3h_mm': rain_3h + random.uniform(-5, 5),
-            'rain_24h_mm': rain_24h + random.uniform(-10, 10),
+            'rain_1h_mm': rain_1h + rain_1h_jitter[i],
+            'rain_3h_mm': rain_3h + rain_3h_jitter[i],
+            'rain_24h_mm': rain_24h + rain_24h_jitter[i],
             'rain_forecast_3h_mm': rain_3h * 1.1,
             'yamuna_level_m': yamuna_level,
-            'drain_blockage_risk': defaults.get('drain_blockage_risk', 0.5) + random.uniform(-0.1, 0.1),
-            'citizen_reports_count': int(defaults.get('citizen_reports_count', 0) + random.uniform(0, 3))
-        }
-        
-        prediction = make_prediction(features)
-        ward_predictions[ward] = prediction
+            'drain_blockage_risk': defaults.get('drain_blockage_risk', 0.5) + blockage_jitter[i],
+            'citizen_reports_count': int(defaults.get('citizen_reports_count', 0) + reports_jitter[i])
+        })
+    
+    # Rows are addressed by ward: the blockage jitter would keep them off an exact static match
+    ward_predictions = dict(zip(wards, make_batch_prediction(features_list, wards=wards)))
     
     # Calculate stats
     risk_counts = {'0': 0, '1': 0, '2': 0}
     for pred in ward_predictions.values():
         risk_counts[str(pred['flood_risk_level'])] += 1
     
-    # Generate live updates
+    # Generate live updates for the three most at-risk wards
+    most_at_risk = sorted(
+        ward_predictions.items(),
+        key=lambda item: (item[1]['flood_risk_level'], item[1]['confidence']),
+        reverse=True
+    )[:3]
     live_updates = []
-    for ward, pred in list(ward_predictions.items())[:3]:
+    for ward, pred in most_at_risk:
         if pred['flood_risk_level'] >= 1:
             live_updates.append({
                 'ward': ward,
@@ -313,7 +1040,7 @@ def demo():
     return {
         "timestamp": base_time.isoformat(),
         "stats": {
-            "totalWards": len(wards),
+            "totalWards": n_wards,
             "highRisk": risk_counts['2'],
             "mediumRisk": risk_counts['1'],
             "lowRisk": risk_counts['0']
@@ -330,6 +1057,101 @@ def demo():
         }
     }
 
+def refresh_demo_snapshot() -> DemoSnapshot:
+    """Recompute the city-wide snapshot and publish it if its content changed"""
+    global demo_snapshot
+    
+    payload = build_demo_payload()
+    # The ETag covers everything except the timestamp, so unchanged content keeps its ETag
+    content = {key: value for key, value in payload.items() if key != 'timestamp'}
+    digest = hashlib.sha1(json.dumps(content, sort_keys=True).encode()).hexdigest()
+    etag = f'"{digest}"'
+    
+    current = demo_snapshot
+    if current is not None and current.etag == etag:
+        return current
+    
+    # Serialize once; every poll until the next change reuses these bytes
+    with metrics.timed('serialization'):
+        body = json.dumps(payload).encode()
+    demo_snapshot = DemoSnapshot(etag=etag, body=body, payload=payload)
+    return demo_snapshot
+
+def build_demo_delta(snapshot: DemoSnapshot) -> Optional[Dict[str, Any]]:
+    """Wards whose risk level or confidence moved since they were last pushed"""
+    changed = {}
+    for ward, pred in snapshot.payload['ward_data'].items():
+        last = demo_last_pushed.get(ward)
+        if (last is None or last[0] != pred['flood_risk_level']
+                or abs(last[1] - pred['confidence']) >= DEMO_STREAM_CONFIDENCE_DELTA):
+            changed[ward] = pred
+            demo_last_pushed[ward] = (pred['flood_risk_level'], pred['confidence'])
+    
+    if not changed:
+        return None
+    
+    delta = {key: value for key, value in snapshot.payload.items() if key != 'ward_data'}
+    delta['ward_data'] = changed
+    return delta
+
+async def demo_refresh_loop():
+    """Rebuild the /demo snapshot every DEMO_REFRESH_SECONDS off the event loop"""
+    while True:
+        try:
+            previous = demo_snapshot
+            snapshot = await asyncio.to_thread(refresh_demo_snapshot)
+            if snapshot is not previous:
+                delta = build_demo_delta(snapshot)
+                if delta is not None:
+                    # Encoded once, shared by every connected client; a client that fell
+                    # behind gets the whole snapshot instead, since it missed a delta
+                    demo_broadcaster.publish(format_sse('delta', json.dumps(delta)),
+                                             resync=lambda: format_sse('snapshot', snapshot.body.decode()))
+        except Exception as e:
+            print(f"Demo snapshot refresh error: {e}")
+        await asyncio.sleep(DEMO_REFRESH_SECONDS)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header lists the given ETag (weak or strong)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or any(tag.removeprefix('W/') == etag for tag in candidates)
+
+@app.get("/demo")
+async def demo(request: Request):
+    """Return demo data for live simulation from the precomputed snapshot"""
+    snapshot = demo_snapshot or await asyncio.to_thread(refresh_demo_snapshot)
+    headers = {'ETag': snapshot.etag, 'Cache-Control': 'no-cache'}
+    
+    if etag_matches(request.headers.get('if-none-match'), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=snapshot.body, media_type='application/json', headers=headers)
+
+@app.get("/demo/stream")
+async def demo_stream(request: Request):
+    """Push live ward risk updates as server-sent events: one snapshot, then deltas"""
+    queue = demo_broadcaster.subscribe()
+    
+    async def events():
+        try:
+            snapshot = demo_snapshot or await asyncio.to_thread(refresh_demo_snapshot)
+            yield format_sse('snapshot', snapshot.body.decode())
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=DEMO_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            demo_broadcaster.unsubscribe(queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 if __name__ == '__main__':
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
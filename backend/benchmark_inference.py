@@ -0,0 +1,165 @@
+"""
+Offline micro-benchmarks for the inference path (no HTTP)
+Times raw predict_proba, make_prediction, make_batch_prediction, get_ward_defaults and
+calculate_flood_depth(s) at several batch sizes for every trained model, reporting ns/row, peak
+traced bytes per row and memory blocks per row
+
+    python benchmark_inference.py
+    python benchmark_inference.py --sizes 1,100,10000 --output benchmarks/micro.json
+"""
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+import joblib
+import numpy as np
+
+import app
+
+DEFAULT_SIZES = (1, 10, 100, 1000, 100000)
+
+def feature_rows(n, rng):
+    """n feature dicts and the matching (n x n_features) matrix, sampled from the dataset rows"""
+    if app.ward_data is not None:
+        source = app.ward_data[app.feature_cols].to_numpy(dtype=np.float64)
+    else:
+        source = np.array([[app.build_features(app.PredictionRequest())[col] for col in app.feature_cols]])
+    matrix = source[rng.integers(len(source), size=n)]
+    # Only distinct rows need dicts; the list repeats them to length n
+    distinct = min(n, 1000)
+    dicts = [dict(zip(app.feature_cols, row)) for row in matrix[:distinct].tolist()]
+    return [dicts[i % distinct] for i in range(n)], matrix
+
+def ward_names(n):
+    wards = list(app.ward_index) if app.ward_index else app.DEMO_WARDS
+    return [wards[i % len(wards)] for i in range(n)]
+
+def time_per_row(fn, rows, min_seconds):
+    """Best per-call wall time over repeated calls (at least 3, or min_seconds), in ns/row"""
+    fn()  # warm up
+    best = float('inf')
+    calls = 0
+    started = time.perf_counter()
+    while calls < 3 or time.perf_counter() - started < min_seconds:
+        start = time.perf_counter_ns()
+        fn()
+        best = min(best, time.perf_counter_ns() - start)
+        calls += 1
+    return best / rows
+
+def allocations_per_row(fn, rows):
+    """(peak bytes, blocks) of one call, per row; only allocations Python and NumPy report are seen
+
+    The peak is the high-water mark above the memory in use before the call, which includes the
+    largest temporaries; blocks are the memory blocks the call left allocated, its result included.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        after = tracemalloc.take_snapshot()
+        del result
+        blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+        return peak / rows, blocks / rows
+    finally:
+        tracemalloc.stop()
+
+def per_row_loop(fn, items, loop_limit):
+    """(loop, rows, one call) calling fn once per item; above loop_limit only the first loop_limit
+    items run, which leaves ns/row unaffected"""
+    items = items[:loop_limit]
+    def run():
+        for item in items:
+            fn(item)
+    return run, len(items), lambda: fn(items[0])
+
+def benchmark_cases(models, size, rng, loop_limit):
+    """(name, model, timed fn, rows, (allocation fn, rows)) for one batch size
+
+    Batch calls are traced whole; per-row functions trace a single call, since the peak of a loop
+    says nothing about what each row allocates.
+    """
+    features_list, matrix = feature_rows(size, rng)
+    for name, model in models.items():
+        run = lambda model=model: model.predict_proba(matrix)
+        yield 'predict_proba', name, run, size, (run, size)
+        if name in app.model_registry:
+            run = lambda name=name: app.make_batch_prediction(features_list, name)
+            yield 'make_batch_prediction', name, run, size, (run, size)
+            run, rows, one = per_row_loop(lambda features, name=name: app.make_prediction(features, name),
+                                          features_list, loop_limit)
+            yield 'make_prediction', name, run, rows, (one, 1)
+
+    run, rows, one = per_row_loop(app.get_ward_defaults, ward_names(size), loop_limit)
+    yield 'get_ward_defaults', '-', run, rows, (one, 1)
+    levels_all = rng.integers(3, size=size)
+    levels = levels_all[:loop_limit].tolist()
+    run, rows, one = per_row_loop(lambda pair: app.calculate_flood_depth(*pair),
+                                  list(zip(features_list, levels)), loop_limit)
+    yield 'calculate_flood_depth', '-', run, rows, (one, 1)
+    run = lambda: app.calculate_flood_depths(*app.depth_inputs(features_list), levels_all)
+    yield 'calculate_flood_depths', '-', run, size, (run, size)
+
+def load_models(include_sklearn):
+    """Registry models, plus the pickled sklearn forest when the registry serves the flat export"""
+    app.load_model()
+    models = {name: app.model_registry.get(name) for name in app.model_registry.stats()['models']}
+    sklearn_model = models.get('random_forest')
+    if include_sklearn and os.path.exists(app.MODEL_PATH) and not hasattr(sklearn_model, 'estimators_'):
+        models['random_forest_sklearn'] = joblib.load(app.MODEL_PATH)
+    return models
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark the inference path without HTTP")
+    parser.add_argument('--sizes', default=','.join(str(n) for n in DEFAULT_SIZES),
+                        help="Comma-separated batch sizes")
+    parser.add_argument('--min-seconds', type=float, default=0.5, help="Minimum timing per case")
+    parser.add_argument('--loop-limit', type=int, default=10000,
+                        help="Per-row functions are called at most this many times per batch")
+    parser.add_argument('--no-sklearn', action='store_true', help="Skip the pickled sklearn forest")
+    parser.add_argument('--risk-surface', action='store_true',
+                        help="Keep the risk surface in the make_* paths (default: measure the models)")
+    parser.add_argument('--no-alloc', action='store_true', help="Skip the tracemalloc pass")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="Also save the rows as JSON")
+    args = parser.parse_args()
+
+    models = load_models(not args.no_sklearn)
+    if not args.risk_surface:
+        app.risk_surface = None
+    sizes = [int(n) for n in args.sizes.split(',')]
+    rng = np.random.default_rng(args.seed)
+
+    print(f"\n{'benchmark':<22} {'model':<22} {'batch':>7} {'ns/row':>12} {'peak B/row':>12} {'blocks/row':>11}")
+    results = []
+    for size in sizes:
+        for bench, model_name, fn, rows, alloc_case in benchmark_cases(models, size, rng, args.loop_limit):
+            ns_per_row = time_per_row(fn, rows, args.min_seconds)
+            peak_bytes, blocks = (None, None) if args.no_alloc else allocations_per_row(*alloc_case)
+            results.append({
+                'benchmark': bench,
+                'model': model_name,
+                'batch_size': size,
+                'timed_rows': rows,
+                'ns_per_row': round(ns_per_row, 1),
+                'peak_bytes_per_row': round(peak_bytes, 1) if peak_bytes is not None else None,
+                'blocks_per_row': round(blocks, 2) if blocks is not None else None
+            })
+            alloc = (f"{peak_bytes:>12.1f} {blocks:>11.2f}" if peak_bytes is not None
+                     else f"{'-':>12} {'-':>11}")
+            print(f"{bench:<22} {model_name:<22} {size:>7} {ns_per_row:>12.1f} {alloc}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({'sizes': sizes, 'models': list(models), 'results': results}, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
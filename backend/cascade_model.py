@@ -0,0 +1,41 @@
+"""
+Two-tier cascade: a distilled fast model first, the full model only for low-confidence rows
+"""
+
+import numpy as np
+
+class CascadeModel:
+    """predict_proba from the fast model, re-scoring rows below threshold with the full model"""
+
+    def __init__(self, fast_model, full_model, threshold=0.8):
+        self.fast_model = fast_model
+        self.full_model = full_model
+        self.threshold = threshold
+        self.classes_ = full_model.classes_
+        self.rows = 0
+        self.escalated = 0
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        probabilities = self.fast_model.predict_proba(X)
+        escalate = probabilities.max(axis=1) < self.threshold
+        if escalate.any():
+            probabilities[escalate] = self.full_model.predict_proba(X[escalate])
+        self.rows += len(X)
+        self.escalated += int(escalate.sum())
+        return probabilities
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def reset_stats(self):
+        self.rows = 0
+        self.escalated = 0
+
+    def stats(self):
+        return {
+            'threshold': self.threshold,
+            'rows': self.rows,
+            'escalated': self.escalated,
+            'escalation_rate': round(self.escalated / self.rows, 4) if self.rows else 0.0
+        }
@@ -0,0 +1,64 @@
+"""
+Fan-out of live ward risk events to connected dashboards
+Each subscriber gets a bounded queue; a slow client never blocks the others. When its queue
+overflows, its pending events are replaced by a full resync event (or the oldest is dropped)
+"""
+
+import asyncio
+
+class DemoBroadcaster:
+    """Publishes pre-encoded server-sent events to every subscriber queue"""
+
+    def __init__(self, queue_size=8):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self.published = 0
+        self.dropped = 0
+        self.resyncs = 0
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, event, resync=None):
+        """Queue one event for every subscriber (must run on the event loop)
+
+        resync builds an event that supersedes everything queued before it (a full snapshot).
+        A subscriber whose queue is full gets its queue replaced by that event, since dropping
+        a delta would leave it out of sync; without resync the oldest event is dropped.
+        """
+        resync_event = None
+        for queue in self._subscribers:
+            if queue.full():
+                if resync is None:
+                    # Drop-oldest backpressure
+                    queue.get_nowait()
+                    self.dropped += 1
+                else:
+                    while not queue.empty():
+                        queue.get_nowait()
+                        self.dropped += 1
+                    if resync_event is None:
+                        resync_event = resync()
+                    queue.put_nowait(resync_event)
+                    self.resyncs += 1
+                    continue
+            queue.put_nowait(event)
+        self.published += 1
+
+    def stats(self):
+        return {
+            'subscribers': len(self._subscribers),
+            'queue_size': self.queue_size,
+            'events_published': self.published,
+            'events_dropped': self.dropped,
+            'resyncs': self.resyncs
+        }
+
+def format_sse(event_type, data):
+    """Encode one server-sent event; data is a JSON string"""
+    return f"event: {event_type}\ndata: {data}\n\n"
@@ -0,0 +1,76 @@
+"""
+Rule-based flood risk used when no model is available (or in degraded mode)
+Thresholds come from fallback_rules.json; rows are scored one at a time or as whole arrays
+"""
+
+import json
+
+import numpy as np
+
+class RuleEngine:
+    """Ordered threshold rules: the first rule with any input above its threshold sets the risk level
+
+    Config format:
+        {"defaults": {input: value used when a row lacks it},
+         "rules": [{"risk_level": 2, "confidence": 0.85, "above": {input: threshold}}, ...],
+         "otherwise": {"risk_level": 0, "confidence": 0.7}}
+    """
+
+    def __init__(self, defaults, rules, otherwise, n_classes=3):
+        self.defaults = dict(defaults)
+        self.rules = [(int(rule['risk_level']), float(rule['confidence']), dict(rule['above'])) for rule in rules]
+        self.otherwise = (int(otherwise['risk_level']), float(otherwise['confidence']))
+        self.n_classes = n_classes
+        unknown = {col for _, _, above in self.rules for col in above} - set(self.defaults)
+        if unknown:
+            raise ValueError(f"Rule inputs without a default: {', '.join(sorted(unknown))}")
+
+    @classmethod
+    def load(cls, path, n_classes=3):
+        with open(path) as f:
+            config = json.load(f)
+        return cls(config['defaults'], config['rules'], config['otherwise'], n_classes)
+
+    def predict_one(self, features):
+        """(risk_level, confidence) for one features dict"""
+        for risk_level, confidence, above in self.rules:
+            if any(features.get(col, self.defaults[col]) > threshold for col, threshold in above.items()):
+                return risk_level, confidence
+        return self.otherwise
+
+    def inputs(self, features_list):
+        """Column arrays of the rule inputs for a list of features dicts"""
+        return {
+            col: np.array([features.get(col, default) for features in features_list], dtype=float)
+            for col, default in self.defaults.items()
+        }
+
+    def predict(self, columns):
+        """(risk_levels, confidences) arrays for column arrays of the rule inputs"""
+        n_rows = len(next(iter(columns.values())))
+        risk_levels = np.full(n_rows, self.otherwise[0], dtype=np.intp)
+        confidences = np.full(n_rows, self.otherwise[1])
+        # Lowest-priority rule first, so earlier rules overwrite the rows they also match
+        for risk_level, confidence, above in reversed(self.rules):
+            fired = np.zeros(n_rows, dtype=bool)
+            for col, threshold in above.items():
+                fired |= columns[col] > threshold
+            risk_levels[fired] = risk_level
+            confidences[fired] = confidence
+        return risk_levels, confidences
+
+    def predict_batch(self, features_list):
+        return self.predict(self.inputs(features_list))
+
+    def probabilities(self, risk_levels, confidences):
+        """Per-class vectors: the confidence on the predicted class, the rest spread evenly"""
+        probabilities = np.repeat(((1.0 - confidences) / (self.n_classes - 1))[:, None], self.n_classes, axis=1)
+        probabilities[np.arange(len(risk_levels)), risk_levels] = confidences
+        return probabilities
+
+    def stats(self):
+        return {
+            'rules': [{'risk_level': risk_level, 'confidence': confidence, 'above': above}
+                      for risk_level, confidence, above in self.rules],
+            'otherwise': {'risk_level': self.otherwise[0], 'confidence': self.otherwise[1]}
+        }
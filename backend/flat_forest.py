@@ -0,0 +1,125 @@
+"""
+Flat array-based evaluator for a trained RandomForestClassifier
+Packs every tree into shared NumPy node arrays and walks all trees for a batch at once
+"""
+
+import hashlib
+import os
+
+import joblib
+import numpy as np
+
+class FlatForest:
+    """Drop-in predict/predict_proba replacement for a fitted sklearn RandomForestClassifier"""
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth, children=None,
+                 teacher_fingerprint=None):
+        self.feature = feature        # (n_nodes,) split feature per node
+        self.threshold = threshold    # (n_nodes,) go left when x[feature] <= threshold
+        self.left = left              # (n_nodes,) global index of left child (self for leaves)
+        self.right = right            # (n_nodes,) global index of right child (self for leaves)
+        self.value = value            # (n_nodes, n_classes) class fractions at each node
+        self.roots = roots            # (n_trees,) global index of each tree's root
+        self.classes_ = classes
+        self.max_depth = int(max_depth)
+        # Interleaved [left, right] pairs so a step is one gather at node * 2 + go_right
+        if children is None:
+            children = np.stack([left, right], axis=1).ravel().astype(np.intp)
+        self.children = children
+        # fingerprint() of the forest a distilled student was fitted to, None for a plain forest
+        self.teacher_fingerprint = teacher_fingerprint
+
+    @classmethod
+    def from_sklearn(cls, forest, classes=None):
+        """Flatten the estimators of a fitted forest (or a single fitted tree) into packed node arrays
+
+        A multi-output DecisionTreeRegressor fitted on class probabilities (a distilled
+        student) is accepted too; pass its classes explicitly.
+        """
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in getattr(forest, 'estimators_', [forest]):
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            # Leaves point at themselves so every row can take max_depth steps
+            left = np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + offset
+            if tree.n_outputs > 1:
+                # Regressor on per-class probabilities: one output per class
+                value = np.clip(tree.value[:, :, 0].astype(np.float64), 0.0, None)
+            else:
+                value = tree.value[:, 0, :].astype(np.float64)
+            value /= value.sum(axis=1, keepdims=True)
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(left)
+            rights.append(right)
+            values.append(value)
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(forest.classes_ if classes is None else classes),
+            max_depth=max_depth
+        )
+
+    def save(self, path):
+        """Write the packed arrays uncompressed so load() can memory-map them
+
+        Written to a temp file and renamed, so a server still mapping the old file keeps valid pages.
+        """
+        tmp_path = path + '.tmp'
+        joblib.dump({
+            'feature': self.feature, 'threshold': self.threshold,
+            'left': self.left, 'right': self.right, 'value': self.value,
+            'roots': self.roots, 'classes': self.classes_, 'max_depth': self.max_depth,
+            'children': self.children, 'teacher_fingerprint': self.teacher_fingerprint
+        }, tmp_path, compress=0)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        """Read a forest written by save(); mmap_mode='r' shares the arrays through the page cache"""
+        return cls(**joblib.load(path, mmap_mode=mmap_mode))
+
+    def fingerprint(self):
+        """Content hash of the node arrays: identical for the same fitted forest however it was loaded"""
+        digest = hashlib.sha1()
+        for array in (self.feature, self.threshold, self.left, self.right, self.value, self.roots):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def predict_proba(self, X):
+        """Average the leaf class fractions of all trees for each row"""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_base = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        nodes = np.tile(self.roots.astype(np.intp), (n_rows, 1))
+
+        for _ in range(self.max_depth):
+            go_right = flat_X.take(row_base + self.feature.take(nodes)) > self.threshold.take(nodes)
+            nodes = self.children.take(nodes * 2 + go_right)
+
+        return self.value.take(nodes, axis=0).mean(axis=1)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
@@ -0,0 +1,267 @@
+"""
+Latency-constrained hyperparameter search for the flood risk models
+Successive halving (or Hyperband) over RandomForest and XGBoost candidates, picking the best
+macro-F1 whose single-row p99 latency fits the serving budget; finished trials are cached on disk
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+
+from flat_forest import FlatForest
+from train_model import build_random_forest, build_xgboost
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+CACHE_DIR = os.path.join(MODELS_DIR, 'search_cache')
+
+# Bump when a trial's meaning changes so stale cache entries are ignored
+TRIAL_VERSION = 1
+
+SEARCH_SPACE = {
+    'random_forest': {
+        'n_estimators': [25, 50, 100, 200],
+        'max_depth': [6, 8, 10, 14],
+        'min_samples_leaf': [1, 2, 5]
+    },
+    'xgboost': {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [3, 4, 6, 8],
+        'learning_rate': [0.05, 0.1, 0.2]
+    }
+}
+
+BUILDERS = {
+    'random_forest': build_random_forest,
+    'xgboost': build_xgboost
+}
+
+def add_search_arguments(parser):
+    parser.add_argument('--strategy', choices=('halving', 'hyperband'), default='halving')
+    parser.add_argument('--candidates', type=int, default=12,
+                        help="Starting candidates for successive halving")
+    parser.add_argument('--eta', type=int, default=3, help="Keep 1/eta of the candidates per rung")
+    parser.add_argument('--min-rows', type=int, default=5000, help="Training rows in the first rung")
+    parser.add_argument('--p99-ms', type=float, default=1.0, help="Single-row p99 latency budget")
+    parser.add_argument('--latency-samples', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-cache', action='store_true')
+
+def sample_candidates(n, rng):
+    """n distinct (family, params) pairs drawn from SEARCH_SPACE"""
+    grid = []
+    for family, space in SEARCH_SPACE.items():
+        for values in itertools.product(*space.values()):
+            grid.append((family, dict(zip(space.keys(), values))))
+    picks = rng.choice(len(grid), size=min(n, len(grid)), replace=False)
+    return [grid[i] for i in picks]
+
+def dataset_hash(split):
+    digest = hashlib.sha1()
+    for name in ('X_fit', 'y_fit', 'X_val', 'y_val'):
+        digest.update(np.ascontiguousarray(split[name]).tobytes())
+    return digest.hexdigest()
+
+def trial_key(data_hash, family, params, budget_rows, latency_samples):
+    payload = json.dumps([TRIAL_VERSION, data_hash, family, params, budget_rows, latency_samples],
+                         sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def load_cached_trial(key):
+    path = os.path.join(CACHE_DIR, f'{key}.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_cached_trial(key, trial):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f'{key}.json')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(trial, f)
+    os.replace(tmp_path, path)
+
+def serving_predictor(family, model):
+    """The predict_proba the API would call for this model"""
+    if family == 'random_forest':
+        return FlatForest.from_sklearn(model).predict_proba
+    return model.predict_proba
+
+def single_row_latency(predict, X, samples):
+    """p50/p99 milliseconds of one-row predict_proba calls"""
+    rows = X[np.arange(samples) % len(X)]
+    for row in rows[:10]:
+        predict(row[None, :])
+    timings = np.empty(samples)
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        predict(row[None, :])
+        timings[i] = time.perf_counter() - start
+    return float(np.percentile(timings, 50) * 1000), float(np.percentile(timings, 99) * 1000)
+
+def run_trial(split_path, family, params, budget_rows, latency_samples):
+    """Fit one candidate on the first budget_rows rows (one core) and score it"""
+    split = joblib.load(split_path, mmap_mode='r')
+    model = BUILDERS[family](params, n_jobs=1)
+    start = time.perf_counter()
+    model.fit(split['X_fit'][:budget_rows], split['y_fit'][:budget_rows])
+    fit_seconds = time.perf_counter() - start
+
+    y_pred = model.predict(split['X_val'])
+    p50_ms, p99_ms = single_row_latency(serving_predictor(family, model), split['X_val'], latency_samples)
+    return {
+        'family': family,
+        'params': params,
+        'budget_rows': budget_rows,
+        'macro_f1': round(float(f1_score(split['y_val'], y_pred, average='macro')), 4),
+        'p50_ms': round(p50_ms, 4),
+        'p99_ms': round(p99_ms, 4),
+        'fit_seconds': round(fit_seconds, 2)
+    }
+
+def objective(trial, p99_ms):
+    """Sort key: candidates inside the latency budget first, then by macro-F1"""
+    return (trial['p99_ms'] <= p99_ms, trial['macro_f1'], -trial['p99_ms'])
+
+class SearchRunner:
+    """Runs trials on a process pool, reading and writing the on-disk trial cache"""
+
+    def __init__(self, split_path, data_hash, args):
+        self.split_path = split_path
+        self.data_hash = data_hash
+        self.args = args
+        self.trials = []
+        self.cache_hits = 0
+        workers = args.workers or os.cpu_count() or 1
+        # spawn, not fork: OpenMP runtimes are not fork-safe
+        self._pool = ProcessPoolExecutor(max_workers=workers,
+                                         mp_context=multiprocessing.get_context('spawn'))
+
+    def run_rung(self, candidates, budget_rows):
+        results = [None] * len(candidates)
+        pending = {}
+        for i, (family, params) in enumerate(candidates):
+            key = trial_key(self.data_hash, family, params, budget_rows, self.args.latency_samples)
+            cached = None if self.args.no_cache else load_cached_trial(key)
+            if cached is not None:
+                self.cache_hits += 1
+                results[i] = cached
+            else:
+                pending[i] = (key, self._pool.submit(run_trial, self.split_path, family, params,
+                                                     budget_rows, self.args.latency_samples))
+        for i, (key, future) in pending.items():
+            results[i] = future.result()
+            save_cached_trial(key, results[i])
+        self.trials.extend(results)
+        return results
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+def successive_halving(runner, candidates, min_rows, max_rows, eta, p99_ms):
+    """Train every candidate on min_rows, keep the best 1/eta, multiply the rows by eta, repeat"""
+    budget_rows = min_rows
+    while True:
+        budget_rows = min(budget_rows, max_rows)
+        results = runner.run_rung(candidates, budget_rows)
+        ranked = sorted(results, key=lambda trial: objective(trial, p99_ms), reverse=True)
+        print(f"  rung {budget_rows:>8} rows: {len(candidates):>3} candidates, "
+              f"best macro-F1 {ranked[0]['macro_f1']:.4f} (p99 {ranked[0]['p99_ms']:.3f} ms)")
+        if budget_rows >= max_rows:
+            return ranked[0]
+        keep = max(1, len(candidates) // eta)
+        candidates = [(trial['family'], trial['params']) for trial in ranked[:keep]]
+        # A lone survivor goes straight to the full data
+        budget_rows = max_rows if keep == 1 else budget_rows * eta
+
+def hyperband(runner, rng, min_rows, max_rows, eta, p99_ms):
+    """Successive halving brackets trading many cheap candidates against few full-data ones"""
+    s_max = max(0, int(math.log(max_rows / min_rows, eta)))
+    winners = []
+    for s in range(s_max, -1, -1):
+        n = math.ceil((s_max + 1) / (s + 1) * eta ** s)
+        bracket_min_rows = max(min_rows, math.ceil(max_rows / eta ** s))
+        print(f"Bracket s={s}: {n} candidates from {bracket_min_rows} rows")
+        winners.append(successive_halving(runner, sample_candidates(n, rng), bracket_min_rows,
+                                          max_rows, eta, p99_ms))
+    return max(winners, key=lambda trial: objective(trial, p99_ms))
+
+def run_search(split, args):
+    """Entry point for `train_model.py search`; writes search_results.json and best_params.json"""
+    # Hold out a validation set from the training rows; the test rows stay unseen
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        split['X_train'], split['y_train'], test_size=0.2, random_state=args.seed, stratify=split['y_train']
+    )
+    search_split = {'X_fit': X_fit, 'y_fit': y_fit, 'X_val': X_val, 'y_val': y_val}
+    data_hash = dataset_hash(search_split)
+    max_rows = len(y_fit)
+    min_rows = min(args.min_rows, max_rows)
+    rng = np.random.default_rng(args.seed)
+
+    print("\n" + "="*50)
+    print(f"Hyperparameter search ({args.strategy}, eta={args.eta}, p99 budget {args.p99_ms} ms)")
+    print(f"{max_rows} fit rows, {len(y_val)} validation rows, dataset {data_hash[:12]}")
+    print("="*50)
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='flood-search-') as tmp_dir:
+        split_path = os.path.join(tmp_dir, 'split.joblib')
+        joblib.dump(search_split, split_path, compress=0)
+        runner = SearchRunner(split_path, data_hash, args)
+        try:
+            if args.strategy == 'hyperband':
+                best = hyperband(runner, rng, min_rows, max_rows, args.eta, args.p99_ms)
+            else:
+                best = successive_halving(runner, sample_candidates(args.candidates, rng),
+                                          min_rows, max_rows, args.eta, args.p99_ms)
+        finally:
+            runner.shutdown()
+    elapsed = time.perf_counter() - start
+
+    # Best full-budget trial per family, for train_model.py --params
+    full_trials = [trial for trial in runner.trials if trial['budget_rows'] == max_rows]
+    best_params = {}
+    for family in SEARCH_SPACE:
+        family_trials = [trial for trial in full_trials if trial['family'] == family]
+        if family_trials:
+            best_params[family] = max(family_trials, key=lambda trial: objective(trial, args.p99_ms))['params']
+
+    within_budget = best['p99_ms'] <= args.p99_ms
+    print(f"\nBest: {best['family']} {best['params']}")
+    print(f"  macro-F1 {best['macro_f1']:.4f}, p50 {best['p50_ms']:.3f} ms, p99 {best['p99_ms']:.3f} ms")
+    if not within_budget:
+        print(f"Warning: no candidate met the {args.p99_ms} ms p99 budget; picked the best available")
+    print(f"{len(runner.trials)} trials ({runner.cache_hits} from cache) in {elapsed:.1f}s")
+
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    results_path = os.path.join(MODELS_DIR, 'search_results.json')
+    with open(results_path, 'w') as f:
+        json.dump({
+            'strategy': args.strategy,
+            'p99_budget_ms': args.p99_ms,
+            'dataset_hash': data_hash,
+            'best': best,
+            'within_budget': within_budget,
+            'cache_hits': runner.cache_hits,
+            'elapsed_seconds': round(elapsed, 1),
+            'trials': runner.trials
+        }, f, indent=2)
+    params_path = os.path.join(MODELS_DIR, 'best_params.json')
+    with open(params_path, 'w') as f:
+        json.dump(best_params, f, indent=2)
+    print(f"Results saved to {results_path}")
+    print(f"Best parameters saved to {params_path} (train with --params {params_path})")
+    return best
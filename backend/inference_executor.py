@@ -0,0 +1,124 @@
+"""
+Dedicated executor for model inference so async handlers never block the event loop
+Bounds concurrency, sheds load past a queue limit and tracks queue depth
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+class InferenceQueueFull(Exception):
+    """Raised when more requests are waiting for inference than max_queue allows"""
+
+def _warm_worker(warmup):
+    """Run the warm-up call inside a pool worker and report which worker ran it"""
+    if warmup is not None:
+        warmup()
+    return os.getpid()
+
+class InferenceExecutor:
+    """Runs inference calls on a thread pool, or a process pool holding its own model copy"""
+
+    def __init__(self, mode='thread', workers=None, max_concurrency=None, max_queue=256,
+                 initializer=None, warmup=None):
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Unknown inference executor mode: {mode}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or self.workers
+        self.max_queue = max_queue
+        self._initializer = initializer
+        self._warmup = warmup  # picklable no-arg call that exercises a worker's model
+        self._pool = self._make_pool()
+        self.generation = 0  # bumped when restart swaps in a new pool
+        self._semaphore = None
+        self.waiting = 0
+        self.in_flight = 0
+        self.max_waiting_seen = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _make_pool(self):
+        if self.mode == 'process':
+            # initializer loads the model once in every worker process; spawn, not fork: the
+            # server has event loop threads and OpenMP runtimes are not fork-safe
+            return ProcessPoolExecutor(max_workers=self.workers, initializer=self._initializer,
+                                       mp_context=multiprocessing.get_context('spawn'))
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='inference')
+
+    def restart(self):
+        """Give a process pool fresh workers (e.g. after a model reload); calls already running finish on the old ones
+
+        Blocks until every new worker has started and run the warm-up call, so requests never
+        wait on a cold pool; if warming fails the old pool keeps serving and the error is raised.
+        """
+        if self.mode != 'process':
+            return
+        new_pool = self._make_pool()
+        try:
+            self._warm(new_pool)
+        except Exception:
+            new_pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        old_pool, self._pool = self._pool, new_pool
+        self.generation += 1
+        old_pool.shutdown(wait=False)
+
+    def _warm(self, pool):
+        """Start every worker of pool and run the warm-up call on it"""
+        # Workers are spawned on demand, one per submit that finds none idle, so one round
+        # starts them all; a fast worker can take two calls, so repeat until each has run one
+        seen = set()
+        for _ in range(3):
+            futures = [pool.submit(_warm_worker, self._warmup) for _ in range(self.workers)]
+            wait(futures)
+            seen.update(future.result() for future in futures)
+            if len(seen) >= self.workers:
+                break
+
+    async def run(self, fn, *args):
+        """Await fn(*args) on the pool, queueing behind max_concurrency in-flight calls"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self.max_queue and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise InferenceQueueFull(f"{self.waiting} inference requests already queued")
+
+        self.waiting += 1
+        self.max_waiting_seen = max(self.max_waiting_seen, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'generation': self.generation,
+            'workers': self.workers,
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'queue_depth': self.waiting,
+            'max_queue_depth_seen': self.max_waiting_seen,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected
+        }
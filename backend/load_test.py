@@ -0,0 +1,244 @@
+"""
+Load test for the flood prediction API
+Drives /predict, /predict/batch and /demo with concurrent clients using payloads sampled from
+delhi_flood_data.csv, and saves RPS, latency percentiles and errors as JSON to diff between commits
+
+Against a server started here (default):
+    python load_test.py --concurrency 32 --duration 20
+Against a running server:
+    python load_test.py --url http://localhost:8000 --endpoints predict,demo
+Compare with an earlier run:
+    python load_test.py --compare benchmarks/load_<commit>.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, '..', 'DATA')
+DATA_PATH = os.path.join(DATA_DIR, 'delhi_flood_data.csv')
+RESULTS_DIR = os.path.join(BASE_DIR, 'benchmarks')
+
+sys.path.insert(0, DATA_DIR)
+from dataset_io import load_dataset
+
+ENDPOINTS = ('predict', 'predict_batch', 'demo')
+
+# Request fields taken from each sampled CSV row
+PAYLOAD_COLS = ('rain_1h_mm', 'rain_3h_mm', 'rain_24h_mm', 'rain_forecast_3h_mm', 'yamuna_level_m')
+
+def load_payloads(data_path, samples, seed):
+    """/predict bodies from real rows: the ward name plus its observed rain and Yamuna level"""
+    df = load_dataset(data_path)
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(len(df), size=min(samples, len(df)))
+    rows = df.iloc[picks]
+    payloads = []
+    for ward, values in zip(rows['ward_name'].astype(str), rows[list(PAYLOAD_COLS)].to_numpy(dtype=float)):
+        payloads.append({'ward_name': ward, **{col: float(value) for col, value in zip(PAYLOAD_COLS, values)}})
+    return payloads
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+class LocalServer:
+    """app.py under uvicorn on a background thread, for runs without --url"""
+
+    def __init__(self, port):
+        import uvicorn
+        import app
+
+        config = uvicorn.Config(app.app, host='127.0.0.1', port=port, log_level='warning')
+        self.server = uvicorn.Server(config)
+        self.url = f'http://127.0.0.1:{port}'
+        self._thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        while not self.server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("Local server failed to start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self._thread.join(timeout=10)
+
+class EndpointStats:
+    """Latencies and errors for one endpoint"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.status_codes = {}
+
+    def record(self, seconds, status):
+        self.latencies.append(seconds)
+        self.status_codes[status] = self.status_codes.get(status, 0) + 1
+        # 304 is the expected answer to a /demo poll with a current ETag
+        if not (200 <= status < 300 or status == 304):
+            self.errors += 1
+
+    def report(self, elapsed, rows_per_request=1):
+        latencies = np.array(self.latencies) * 1000
+        count = len(latencies)
+        if not count:
+            return {'requests': 0, 'errors': 0}
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return {
+            'requests': count,
+            'errors': self.errors,
+            'error_rate': round(self.errors / count, 4),
+            'rps': round(count / elapsed, 1),
+            'rows_per_second': round(count * rows_per_request / elapsed, 1),
+            'p50_ms': round(float(p50), 3),
+            'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3),
+            'max_ms': round(float(latencies.max()), 3),
+            'status_codes': {str(code): n for code, n in sorted(self.status_codes.items())}
+        }
+
+async def run_client(client, endpoints, payloads, args, stats, deadline, seed):
+    """One simulated client: round-robins the endpoints until the deadline"""
+    rng = np.random.default_rng(seed)
+    etag = None
+    step = 0
+    while time.perf_counter() < deadline:
+        endpoint = endpoints[step % len(endpoints)]
+        step += 1
+        if endpoint == 'predict':
+            request = client.post('/predict', json=payloads[rng.integers(len(payloads))])
+        elif endpoint == 'predict_batch':
+            picks = rng.integers(len(payloads), size=args.batch_size)
+            request = client.post('/predict/batch', json={'rows': [payloads[i] for i in picks]})
+        else:
+            # Poll like the dashboard: revalidate with the last ETag when --demo-etag is set
+            headers = {'If-None-Match': etag} if etag and args.demo_etag else None
+            request = client.get('/demo', headers=headers)
+
+        start = time.perf_counter()
+        try:
+            response = await request
+            status = response.status_code
+            if endpoint == 'demo':
+                etag = response.headers.get('etag', etag)
+        except httpx.HTTPError:
+            status = 599
+        stats[endpoint].record(time.perf_counter() - start, status)
+
+async def run_load(url, endpoints, payloads, args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        if args.warmup > 0:
+            warmup = {name: EndpointStats() for name in endpoints}
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(run_client(client, endpoints, payloads, args, warmup, deadline, i)
+                                   for i in range(args.concurrency)))
+
+        stats = {name: EndpointStats() for name in endpoints}
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(run_client(client, endpoints, payloads, args, stats, deadline, args.seed + i)
+                               for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+    return stats, elapsed
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_report(results, previous=None):
+    print(f"\n{'endpoint':<15} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in results['endpoints'].items():
+        if not row['requests']:
+            continue
+        print(f"{name:<15} {row['requests']:>9} {row['errors']:>7} {row['rps']:>9.1f} "
+              f"{row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f} {row['p99_ms']:>9.3f}")
+        old = (previous or {}).get('endpoints', {}).get(name)
+        if old and old.get('requests'):
+            print(f"{'  vs ' + str(previous.get('commit')):<15} {'':>9} {'':>7} "
+                  f"{row['rps'] - old['rps']:>+9.1f} {row['p50_ms'] - old['p50_ms']:>+9.3f} "
+                  f"{row['p95_ms'] - old['p95_ms']:>+9.3f} {row['p99_ms'] - old['p99_ms']:>+9.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the flood prediction API")
+    parser.add_argument('--url', default=None, help="Running server to test (default: start app.py here)")
+    parser.add_argument('--endpoints', default='predict,predict_batch,demo',
+                        help=f"Comma-separated subset of {', '.join(ENDPOINTS)}")
+    parser.add_argument('--concurrency', type=int, default=16, help="Concurrent clients")
+    parser.add_argument('--duration', type=float, default=10.0, help="Measured seconds")
+    parser.add_argument('--warmup', type=float, default=2.0, help="Unmeasured seconds before the run")
+    parser.add_argument('--batch-size', type=int, default=250, help="Rows per /predict/batch call")
+    parser.add_argument('--demo-etag', action='store_true', help="Send If-None-Match on /demo polls")
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--data', default=DATA_PATH, help="CSV the payloads are sampled from")
+    parser.add_argument('--samples', type=int, default=5000, help="Distinct payloads sampled from the data")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None,
+                        help="Results JSON (default: benchmarks/load_<commit>.json)")
+    parser.add_argument('--compare', default=None, help="Earlier results JSON to print deltas against")
+    args = parser.parse_args()
+
+    endpoints = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = [name for name in endpoints if name not in ENDPOINTS]
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(unknown)} (choose from {', '.join(ENDPOINTS)})")
+
+    payloads = load_payloads(args.data, args.samples, args.seed)
+    print(f"{len(payloads)} payloads from {args.data}")
+    print(f"{args.concurrency} clients for {args.duration}s on {', '.join(endpoints)}")
+
+    if args.url:
+        stats, elapsed = asyncio.run(run_load(args.url, endpoints, payloads, args))
+        target = args.url
+    else:
+        with LocalServer(free_port()) as server:
+            stats, elapsed = asyncio.run(run_load(server.url, endpoints, payloads, args))
+        target = 'local'
+
+    commit = git_commit()
+    results = {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(),
+        'target': target,
+        'concurrency': args.concurrency,
+        'duration_seconds': round(elapsed, 2),
+        'batch_size': args.batch_size,
+        'demo_etag': args.demo_etag,
+        'endpoints': {
+            name: stats[name].report(elapsed, args.batch_size if name == 'predict_batch' else 1)
+            for name in endpoints
+        }
+    }
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(results, previous)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load_{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+if __name__ == '__main__':
+    main()
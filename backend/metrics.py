@@ -0,0 +1,103 @@
+"""
+Latency histograms and counters exposed in the Prometheus text format
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds; sub-millisecond buckets because most phases are tiny
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+class Histogram:
+    """Cumulative-bucket histogram per label set"""
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series_items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for label_values, series in series_items:
+            labels = ','.join(f'{name}="{value}"' for name, value in zip(self.label_names, label_values))
+            prefix = labels + ',' if labels else ''
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        # An unlabelled counter is exported as 0 before its first increment
+        self._values = {} if self.label_names else {(): 0}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            labels = ','.join(f'{name}="{value}"' for name, value in zip(self.label_names, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}" if labels else f"{self.name} {value}")
+        return lines
+
+REQUEST_SECONDS = Histogram('flood_request_duration_seconds', "HTTP request latency by endpoint",
+                            ('method', 'path', 'status'))
+PHASE_SECONDS = Histogram('flood_phase_duration_seconds',
+                          "Time spent in each prediction phase (ward_lookup, feature_assembly, "
+                          "model_inference, risk_surface, depth_calculation, serialization)", ('phase',))
+MODEL_CALLS = Counter('flood_model_calls_total', "Model inference calls", ('model',))
+MODEL_ROWS = Counter('flood_model_rows_total', "Rows scored by model inference calls", ('model',))
+FALLBACK_PREDICTIONS = Counter('flood_fallback_predictions_total', "Rows scored by the rule-based fallback")
+
+@contextmanager
+def timed(phase):
+    """Record the wall time of the block under PHASE_SECONDS{phase=...}"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASE_SECONDS.observe(time.perf_counter() - start, phase)
+
+def render(gauges=None):
+    """All metrics in the Prometheus text exposition format; gauges is {name: (help, value)}"""
+    lines = []
+    for metric in (REQUEST_SECONDS, PHASE_SECONDS, MODEL_CALLS, MODEL_ROWS, FALLBACK_PREDICTIONS):
+        lines.extend(metric.render())
+    for name, (help_text, value) in (gauges or {}).items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return '\n'.join(lines) + '\n'
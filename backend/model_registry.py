@@ -0,0 +1,151 @@
+"""
+Registry of the loaded flood risk models
+Measures each model's single-row latency once at load time and picks the active model by policy
+"""
+
+import threading
+import time
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+
+POLICIES = ('fixed', 'fastest', 'accurate', 'slo')
+
+class UnknownModel(Exception):
+    """Raised for a model name that is not loaded in the registry"""
+
+class ModelEntry(NamedTuple):
+    """One loaded model; entries are replaced as a whole, never mutated"""
+    model: Any
+    path: Optional[str]
+    accuracy: Optional[float]
+    p50_ms: Optional[float]
+    p99_ms: Optional[float]
+
+def measure_latency(model, feature_matrix, samples=100):
+    """Time one-row predict_proba calls (the first few warm the model up); returns p50/p99 in ms"""
+    rows = feature_matrix[np.arange(samples) % len(feature_matrix)]
+    for row in rows[:5]:
+        model.predict_proba(row[None, :])
+    timings = np.empty(samples)
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        model.predict_proba(row[None, :])
+        timings[i] = time.perf_counter() - start
+    return (round(float(np.percentile(timings, 50)) * 1000, 4),
+            round(float(np.percentile(timings, 99)) * 1000, 4))
+
+class ModelRegistry:
+    """Holds every loaded model; switching the active one never reloads an artifact
+
+    The name -> ModelEntry dict is swapped in one assignment, so a request that
+    already fetched its model finishes on it while new requests see the new set.
+    """
+
+    def __init__(self, policy='fixed', default_model=None, slo_p99_ms=1.0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown model policy: {policy}")
+        self.policy = policy
+        self.default_model = default_model
+        self.slo_p99_ms = slo_p99_ms
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._pinned = None  # name chosen through set_active, kept across reloads
+        self.active = None
+        self.generation = 0  # bumped on every replace, so results can be tagged with the models that made them
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def replace(self, entries):
+        """Atomically swap in a new set of loaded models and re-apply the selection"""
+        with self._lock:
+            self._entries = dict(entries)
+            self.generation += 1
+        if self._pinned in self._entries:
+            self.active = self._pinned
+            return self.active
+        self._pinned = None
+        return self.select()
+
+    def select(self, policy=None):
+        """Make the model chosen by policy active and return its name (None if nothing is loaded)"""
+        policy = policy or self.policy
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown model policy: {policy}")
+        with self._lock:
+            entries = self._entries
+            if not entries:
+                self.active = None
+                return None
+            names = list(entries)
+            if policy == 'fixed':
+                chosen = self.default_model if self.default_model in entries else names[0]
+            elif policy == 'fastest':
+                chosen = min(names, key=lambda name: self._latency(entries[name]))
+            elif policy == 'accurate':
+                chosen = max(names, key=lambda name: self._rank(entries[name]))
+            else:
+                # Most accurate model inside the latency SLO, else the fastest one
+                within = [name for name in names if self._latency(entries[name]) <= self.slo_p99_ms]
+                if within:
+                    chosen = max(within, key=lambda name: self._rank(entries[name]))
+                else:
+                    chosen = min(names, key=lambda name: self._latency(entries[name]))
+            self.policy = policy
+            self._pinned = None
+            self.active = chosen
+            return chosen
+
+    def set_active(self, name):
+        if name not in self._entries:
+            raise UnknownModel(f"Model '{name}' is not loaded (available: {', '.join(self._entries)})")
+        self._pinned = name
+        self.active = name
+
+    def resolve(self, name=None):
+        """The model name a request should use: an explicit override or the active model"""
+        if name is None:
+            return self.active
+        if name not in self._entries:
+            raise UnknownModel(f"Model '{name}' is not loaded (available: {', '.join(self._entries)})")
+        return name
+
+    def checkout(self, name=None):
+        """(name, model) from one snapshot of the loaded models: name if still loaded, else the
+        active model; for callers whose name was resolved before a reload could replace it"""
+        entries, active = self._entries, self.active
+        if name not in entries:
+            name = active if active in entries else next(iter(entries), None)
+        entry = entries.get(name) if name is not None else None
+        return name, entry.model if entry is not None else None
+
+    def get(self, name=None):
+        name = self.resolve(name)
+        entry = self._entries.get(name) if name is not None else None
+        return entry.model if entry is not None else None
+
+    @staticmethod
+    def _latency(entry):
+        return entry.p99_ms if entry.p99_ms is not None else float('inf')
+
+    @classmethod
+    def _rank(cls, entry):
+        accuracy = entry.accuracy if entry.accuracy is not None else 0.0
+        return (accuracy, -cls._latency(entry))
+
+    def stats(self):
+        return {
+            'policy': self.policy,
+            'active': self.active,
+            'generation': self.generation,
+            'slo_p99_ms': self.slo_p99_ms,
+            'models': {
+                name: {'path': entry.path, 'accuracy': entry.accuracy,
+                       'p50_ms': entry.p50_ms, 'p99_ms': entry.p99_ms}
+                for name, entry in self._entries.items()
+            }
+        }
@@ -0,0 +1,84 @@
+"""
+Micro-batching for concurrent single-row predictions
+Requests arriving within max_wait_ms are scored together in one batched model call
+"""
+
+import asyncio
+
+class RequestCoalescer:
+    """Collects items for up to max_wait_ms or max_batch rows, then runs batch_fn once"""
+
+    # Upper bounds of the batch-size histogram buckets
+    HISTOGRAM_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+    def __init__(self, batch_fn, run_fn, max_wait_ms=2.0, max_batch=64):
+        self.batch_fn = batch_fn      # list of items -> list of results, same order
+        self.run_fn = run_fn          # async runner, e.g. InferenceExecutor.run
+        self.max_wait_ms = max_wait_ms
+        self.max_batch = max_batch
+        self._pending = []            # (item, future) waiting for the next flush
+        self._flush_handle = None
+        self._tasks = set()           # running batches; the loop only keeps weak references
+        self.batches = 0
+        self.rows = 0
+        self.histogram = {bucket: 0 for bucket in self.HISTOGRAM_BUCKETS}
+        self.histogram_overflow = 0
+
+    async def submit(self, item):
+        """Queue one item and wait for its result from the next batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_ms / 1000.0, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch):
+        self._record(len(batch))
+        try:
+            results = await self.run_fn(self.batch_fn, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _record(self, size):
+        self.batches += 1
+        self.rows += size
+        for bucket in self.HISTOGRAM_BUCKETS:
+            if size <= bucket:
+                self.histogram[bucket] += 1
+                return
+        self.histogram_overflow += 1
+
+    def stats(self):
+        return {
+            'max_wait_ms': self.max_wait_ms,
+            'max_batch': self.max_batch,
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+            'batch_size_histogram': {
+                **{f"le_{bucket}": count for bucket, count in self.histogram.items()},
+                f"gt_{self.HISTOGRAM_BUCKETS[-1]}": self.histogram_overflow
+            }
+        }
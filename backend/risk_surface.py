@@ -0,0 +1,239 @@
+"""
+Precomputed per-ward risk surface over the five dynamic inputs
+Built offline from a trained model; serving interpolates a quantized grid instead of walking the forest
+
+Build (and print the accuracy vs grid resolution report):
+    python risk_surface.py --bins 8 --report 4,6,8,10
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+DYNAMIC_COLS = ('rain_1h_mm', 'rain_3h_mm', 'rain_24h_mm', 'rain_forecast_3h_mm', 'yamuna_level_m')
+
+# Grid rows scored per model call while building, bounds the build's working memory
+BUILD_CHUNK_ROWS = 65536
+
+class RiskSurface:
+    """Per-ward class probabilities on a regular grid of the dynamic inputs, stored as uint8
+
+    Rows are matched to a ward by their exact static feature values, or by ward name when the
+    caller knows which ward each row describes (the /demo simulation, which perturbs static
+    inputs such as drain blockage); rows matching no ward or with dynamic inputs outside the
+    grid are reported as misses for the model to score.
+    """
+
+    def __init__(self, feature_cols, wards, statics, lows, highs, bins, table, model_name,
+                 model_signature=None, interpolate=True):
+        self.feature_cols = list(feature_cols)
+        self.dynamic_idx = np.array([self.feature_cols.index(col) for col in DYNAMIC_COLS])
+        self.static_idx = np.array([i for i, col in enumerate(self.feature_cols) if col not in DYNAMIC_COLS])
+        self.wards = list(wards)
+        self.statics = np.asarray(statics, dtype=np.float64)   # (n_wards, n_static)
+        self.lows = np.asarray(lows, dtype=np.float64)          # (5,)
+        self.highs = np.asarray(highs, dtype=np.float64)        # (5,)
+        self.bins = int(bins)
+        self.table = table                                      # (n_wards, bins ** 5, n_classes) uint8
+        self.model_name = model_name
+        self.model_signature = model_signature
+        self.interpolate = interpolate
+        self.steps = (self.highs - self.lows) / (self.bins - 1)
+        self.strides = self.bins ** np.arange(len(DYNAMIC_COLS) - 1, -1, -1)
+        # The 32 corners of a 5-D grid cell as 0/1 offsets
+        self.corners = (np.arange(2 ** len(DYNAMIC_COLS))[:, None] >> np.arange(len(DYNAMIC_COLS))) & 1
+        self.ward_lookup = {tuple(row): offset for offset, row in enumerate(self.statics.tolist())}
+        self.ward_offsets = {ward: offset for offset, ward in enumerate(self.wards)}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def build(cls, predict_proba, feature_cols, wards, statics, lows, highs, bins, model_name,
+              model_signature=None):
+        """Score every grid point of every ward; memory is the uint8 table plus one chunk"""
+        feature_cols = list(feature_cols)
+        dynamic_idx = [feature_cols.index(col) for col in DYNAMIC_COLS]
+        static_idx = [i for i, col in enumerate(feature_cols) if col not in DYNAMIC_COLS]
+        axes = [np.linspace(low, high, bins) for low, high in zip(lows, highs)]
+        grid = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, len(DYNAMIC_COLS))
+
+        table = None
+        matrix = np.empty((min(len(grid), BUILD_CHUNK_ROWS), len(feature_cols)))
+        for ward_offset, ward_statics in enumerate(statics):
+            for start in range(0, len(grid), BUILD_CHUNK_ROWS):
+                chunk = grid[start:start + BUILD_CHUNK_ROWS]
+                rows = matrix[:len(chunk)]
+                rows[:, dynamic_idx] = chunk
+                rows[:, static_idx] = ward_statics
+                probabilities = predict_proba(rows)
+                if table is None:
+                    table = np.empty((len(statics), len(grid), probabilities.shape[1]), dtype=np.uint8)
+                table[ward_offset, start:start + len(chunk)] = np.rint(probabilities * 255)
+
+        return cls(feature_cols, wards, statics, lows, highs, bins, table, model_name, model_signature)
+
+    def save(self, path):
+        """Compressed .npz; uint8 probabilities over a smooth grid compress well"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f, feature_cols=np.array(self.feature_cols), wards=np.array(self.wards),
+                statics=self.statics, lows=self.lows, highs=self.highs, bins=self.bins,
+                table=self.table, model_name=self.model_name,
+                model_signature=np.asarray(self.model_signature if self.model_signature is not None else [],
+                                           dtype=np.int64)
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, interpolate=True):
+        with np.load(path) as data:
+            signature = data['model_signature'].tolist() or None
+            return cls(data['feature_cols'].tolist(), data['wards'].tolist(), data['statics'],
+                       data['lows'], data['highs'], int(data['bins']), data['table'],
+                       str(data['model_name']), signature, interpolate)
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+    def lookup(self, feature_matrix, wards=None):
+        """(hit mask, probabilities for the hit rows) for a feature matrix in feature_cols order
+
+        With wards (one name per row) rows use that ward's grid whatever their static values;
+        without, the ward is found by the row's exact static values.
+        """
+        feature_matrix = np.asarray(feature_matrix, dtype=np.float64)
+        if wards is not None:
+            ward_offsets = np.array([self.ward_offsets.get(ward, -1) for ward in wards], dtype=np.intp)
+        else:
+            ward_offsets = np.array([self.ward_lookup.get(tuple(row), -1)
+                                     for row in feature_matrix[:, self.static_idx].tolist()], dtype=np.intp)
+        dynamic = feature_matrix[:, self.dynamic_idx]
+        hit = (ward_offsets >= 0) & np.all((dynamic >= self.lows) & (dynamic <= self.highs), axis=1)
+        n_hits = int(hit.sum())
+        self.hits += n_hits
+        self.misses += len(feature_matrix) - n_hits
+        if not n_hits:
+            return hit, np.empty((0, self.table.shape[2]))
+
+        wards = ward_offsets[hit]
+        position = (dynamic[hit] - self.lows) / self.steps
+        if not self.interpolate:
+            cells = np.rint(position).astype(np.intp) @ self.strides
+            probabilities = self.table[wards, cells].astype(np.float64)
+            return hit, probabilities / probabilities.sum(axis=1, keepdims=True)
+
+        # Multilinear interpolation between the 32 corners of the enclosing cell
+        base = np.clip(np.floor(position), 0, self.bins - 2).astype(np.intp)
+        frac = position - base
+        cells = (base[:, None, :] + self.corners[None, :, :]) @ self.strides          # (n, 32)
+        weights = np.where(self.corners[None, :, :], frac[:, None, :], 1 - frac[:, None, :]).prod(axis=2)
+        values = self.table[wards[:, None], cells].astype(np.float64)                 # (n, 32, n_classes)
+        probabilities = np.einsum('nc,nck->nk', weights, values)
+        # Undo the uint8 rounding so every row sums to 1
+        return hit, probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def stats(self):
+        looked_up = self.hits + self.misses
+        return {
+            'model': self.model_name,
+            'wards': len(self.wards),
+            'bins': self.bins,
+            'interpolate': self.interpolate,
+            'table_mb': round(self.nbytes / 1e6, 2),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / looked_up, 4) if looked_up else 0.0
+        }
+
+def grid_bounds(ward_data):
+    """Grid range per dynamic input: zero rain up to the dataset maximum, the observed Yamuna range"""
+    lows, highs = [], []
+    for col in DYNAMIC_COLS:
+        values = ward_data[col].astype(float)
+        low = float(np.floor(values.min())) if col == 'yamuna_level_m' else 0.0
+        lows.append(low)
+        highs.append(float(np.ceil(values.max())))
+    return np.array(lows), np.array(highs)
+
+def accuracy_report(predict_proba, feature_cols, wards, statics, lows, highs, bins_list, model_name,
+                    samples=2000, seed=42):
+    """Class agreement and probability error against the model at each grid resolution"""
+    rng = np.random.default_rng(seed)
+    dynamic_idx = [feature_cols.index(col) for col in DYNAMIC_COLS]
+    static_idx = [i for i, col in enumerate(feature_cols) if col not in DYNAMIC_COLS]
+    ward_pick = rng.integers(len(statics), size=samples)
+    X = np.empty((samples, len(feature_cols)))
+    X[:, static_idx] = statics[ward_pick]
+    X[:, dynamic_idx] = rng.uniform(lows, highs, size=(samples, len(DYNAMIC_COLS)))
+    expected = predict_proba(X)
+
+    rows = []
+    for bins in bins_list:
+        started = time.perf_counter()
+        surface = RiskSurface.build(predict_proba, feature_cols, wards, statics, lows, highs, bins, model_name)
+        build_seconds = time.perf_counter() - started
+        for interpolate in (False, True):
+            surface.interpolate = interpolate
+            _, probabilities = surface.lookup(X)
+            rows.append({
+                'bins': bins,
+                'interpolate': interpolate,
+                'class_agreement': round(float((probabilities.argmax(1) == expected.argmax(1)).mean()), 4),
+                'mean_abs_error': round(float(np.abs(probabilities - expected).mean()), 4),
+                'table_mb': round(surface.nbytes / 1e6, 2),
+                'build_seconds': round(build_seconds, 1)
+            })
+    return rows
+
+def main():
+    import app  # the API's ward index and model registry
+
+    parser = argparse.ArgumentParser(description="Build the per-ward risk surface used by the API")
+    parser.add_argument('--bins', type=int, default=8, help="Grid points per dynamic input")
+    parser.add_argument('--model', default=None, help="Registry model to tabulate (default: the active model)")
+    parser.add_argument('--report', default=None,
+                        help="Comma-separated resolutions to compare against the model, e.g. 4,6,8,10")
+    parser.add_argument('--report-wards', type=int, default=10, help="Wards built per report resolution")
+    args = parser.parse_args()
+
+    app.load_model()
+    if app.ward_index is None:
+        raise SystemExit("Ward data is required to build the risk surface")
+    model_name = app.model_registry.resolve(args.model)
+    model = app.model_registry.get(model_name)
+    if model is None:
+        raise SystemExit("No trained model loaded - run: python train_model.py")
+
+    def predict_proba(matrix):
+        return app.predict_risk(model, matrix)[1]
+
+    wards = list(app.ward_index)
+    statics_by_ward = [app.get_ward_defaults(ward) for ward in wards]
+    static_cols = [col for col in app.feature_cols if col not in DYNAMIC_COLS]
+    statics = np.array([[defaults[col] for col in static_cols] for defaults in statics_by_ward], dtype=np.float64)
+    lows, highs = grid_bounds(app.ward_data)
+
+    if args.report:
+        bins_list = [int(b) for b in args.report.split(',')]
+        print(f"\nAccuracy vs grid resolution ({min(args.report_wards, len(wards))} wards, model {model_name}):")
+        print(f"{'bins':>5} {'interp':>7} {'agreement':>10} {'mean |dp|':>10} {'MB/ward':>8} {'build s':>8}")
+        subset = statics[:args.report_wards]
+        for row in accuracy_report(predict_proba, app.feature_cols, wards[:args.report_wards], subset,
+                                   lows, highs, bins_list, model_name):
+            print(f"{row['bins']:>5} {str(row['interpolate']):>7} {row['class_agreement']:>10.4f} "
+                  f"{row['mean_abs_error']:>10.4f} {row['table_mb'] / len(subset):>8.3f} {row['build_seconds']:>8.1f}")
+
+    print(f"\nBuilding {args.bins}^{len(DYNAMIC_COLS)} grid for {len(wards)} wards from {model_name}...")
+    started = time.perf_counter()
+    surface = RiskSurface.build(predict_proba, app.feature_cols, wards, statics, lows, highs, args.bins,
+                                model_name, app.model_artifact_signature(model_name))
+    surface.save(app.RISK_SURFACE_PATH)
+    print(f"Built in {time.perf_counter() - started:.1f}s: {surface.nbytes / 1e6:.1f} MB in memory, "
+          f"{os.path.getsize(app.RISK_SURFACE_PATH) / 1e6:.1f} MB on disk -> {app.RISK_SURFACE_PATH}")
+
+if __name__ == '__main__':
+    main()
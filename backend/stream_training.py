@@ -0,0 +1,279 @@
+"""
+Out-of-core training for flood datasets larger than RAM
+Streams the CSV (or a sharded manifest) in chunks: XGBoost trains from an external-memory
+iterator, the RandomForest grows a batch of warm-started trees per chunk
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import xgboost as xgb
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, classification_report
+
+from train_model import FEATURE_COLS, TARGET_NAMES, export_flat_forest, remove_stale_student, save_model
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'DATA'))
+from dataset_io import count_rows, dataset_parts, iter_chunks
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_PATH = os.path.join(BASE_DIR, '..', 'DATA', 'delhi_flood_data.csv')
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+CLASSES = np.arange(len(TARGET_NAMES))
+
+def rss_mb():
+    """Current resident set size in MB (Linux /proc, 0.0 elsewhere)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def peak_rss_mb():
+    """Peak resident set size in MB, None where the resource module is missing"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+class RssTracker:
+    """Samples RSS once per chunk so the report shows whether memory stayed flat"""
+
+    def __init__(self):
+        self.samples = []
+
+    def sample(self):
+        self.samples.append(rss_mb())
+
+    def report(self):
+        if not self.samples:
+            return {}
+        return {
+            'rss_first_chunk_mb': round(self.samples[0], 1),
+            'rss_last_chunk_mb': round(self.samples[-1], 1),
+            'rss_max_mb': round(max(self.samples), 1),
+            'peak_rss_mb': peak_rss_mb()
+        }
+
+def split_chunks(csv_path, chunk_size, test_size=0.2, seed=42):
+    """Yield (chunk_index, X_train, y_train, X_test, y_test) per chunk
+
+    The test mask is drawn from (seed, chunk_index), so every pass over the data
+    sees the same split without holding row ids in memory.
+    """
+    columns = FEATURE_COLS + ['flood_risk_level']
+    for index, chunk in enumerate(iter_chunks(csv_path, chunk_size, columns)):
+        X = chunk[FEATURE_COLS].fillna(0).to_numpy(np.float32)
+        y = chunk['flood_risk_level'].to_numpy(np.int8)
+        test_mask = np.random.default_rng([seed, index]).random(len(y)) < test_size
+        yield index, X[~test_mask], y[~test_mask], X[test_mask], y[test_mask]
+
+class TrainChunkIter(xgb.DataIter):
+    """Feeds the training rows of each chunk to XGBoost's external-memory DMatrix"""
+
+    def __init__(self, csv_path, chunk_size, cache_prefix, tracker):
+        self.csv_path = csv_path
+        self.chunk_size = chunk_size
+        self.tracker = tracker
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self.reset()
+        try:
+            _, X_train, y_train, _, _ = next(self._chunks)
+        except StopIteration:
+            return False
+        input_data(data=X_train, label=y_train)
+        self.tracker.sample()
+        return True
+
+    def reset(self):
+        self._chunks = split_chunks(self.csv_path, self.chunk_size)
+
+def evaluate_streaming(predict, csv_path, chunk_size, tracker):
+    """Second pass over the held-out rows; only int8 labels are kept"""
+    y_true, y_pred = [], []
+    for _, _, _, X_test, y_test in split_chunks(csv_path, chunk_size):
+        if len(y_test):
+            y_true.append(y_test)
+            y_pred.append(predict(X_test).astype(np.int8))
+        tracker.sample()
+    return np.concatenate(y_true), np.concatenate(y_pred)
+
+def print_evaluation(name, y_true, y_pred):
+    accuracy = accuracy_score(y_true, y_pred)
+    print(f"\n{name} Accuracy: {accuracy:.4f}")
+    print("\nClassification Report:")
+    print(classification_report(y_true, y_pred, labels=CLASSES, target_names=TARGET_NAMES))
+    return accuracy
+
+def train_xgboost_streaming(csv_path, chunk_size):
+    """Train XGBoost from an external-memory iterator (hist method, pages cached on disk)"""
+    print("\n" + "="*50)
+    print(f"Training XGBoost Model (external memory, {chunk_size} rows/chunk)...")
+    print("="*50)
+
+    tracker = RssTracker()
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='xgb-cache-') as cache_dir:
+        data_iter = TrainChunkIter(csv_path, chunk_size, os.path.join(cache_dir, 'train'), tracker)
+        if hasattr(xgb, 'ExtMemQuantileDMatrix'):
+            # xgboost >= 3.0: quantized pages, the cheapest external-memory format for hist
+            dtrain = xgb.ExtMemQuantileDMatrix(data_iter, max_bin=256)
+        else:
+            # xgboost 2.x (the pinned version): external-memory DMatrix paged to cache_prefix
+            dtrain = xgb.DMatrix(data_iter)
+        booster = xgb.train({
+            'objective': 'multi:softprob',
+            'num_class': len(CLASSES),
+            'tree_method': 'hist',
+            'max_depth': 6,
+            'learning_rate': 0.1,
+            'subsample': 0.8,
+            'colsample_bytree': 0.8,
+            'seed': 42,
+            'eval_metric': 'mlogloss'
+        }, dtrain, num_boost_round=100)
+        del dtrain
+
+        # Load through the sklearn wrapper so the pickle matches the in-memory training path
+        booster_path = os.path.join(cache_dir, 'booster.ubj')
+        booster.save_model(booster_path)
+        xgb_model = xgb.XGBClassifier()
+        xgb_model.load_model(booster_path)
+    train_seconds = time.perf_counter() - start
+
+    y_true, y_pred = evaluate_streaming(xgb_model.predict, csv_path, chunk_size, tracker)
+    accuracy = print_evaluation('XGBoost', y_true, y_pred)
+    return xgb_model, {
+        'accuracy': round(accuracy, 4),
+        'train_seconds': round(train_seconds, 2),
+        'test_rows': int(len(y_true)),
+        **tracker.report()
+    }
+
+def train_random_forest_streaming(csv_path, chunk_size, n_estimators=100):
+    """Grow a warm-started RandomForest, adding an equal share of trees on each chunk
+
+    Each tree only sees one chunk, so memory is bounded by the chunk and the trees,
+    not by the dataset. A chunk missing a risk level gets one zero-weight row per missing
+    level, so every batch fixes the same classes_ without buffering rows across chunks.
+    """
+    n_chunks = max(1, sum(math.ceil(count_rows(part) / chunk_size) for part in dataset_parts(csv_path)))
+    trees_per_chunk = max(1, math.ceil(n_estimators / n_chunks))
+    print("\n" + "="*50)
+    print(f"Training RandomForest Model (warm start, {n_chunks} chunks x {trees_per_chunk} trees)...")
+    print("="*50)
+
+    rf_model = RandomForestClassifier(
+        n_estimators=trees_per_chunk,
+        max_depth=10,
+        min_samples_split=5,
+        min_samples_leaf=2,
+        random_state=42,
+        n_jobs=-1,
+        warm_start=True
+    )
+
+    tracker = RssTracker()
+    start = time.perf_counter()
+    fitted = False
+    padded_chunks = 0
+    skipped_rows = 0
+    for index, X_train, y_train, _, _ in split_chunks(csv_path, chunk_size):
+        if not len(y_train):
+            continue
+        # Every warm-started batch must see all classes or the trees' outputs misalign
+        missing = np.setdiff1d(CLASSES, y_train)
+        weights = np.ones(len(y_train))
+        if len(missing):
+            X_train = np.concatenate([X_train, np.repeat(X_train[:1], len(missing), axis=0)])
+            y_train = np.concatenate([y_train, missing.astype(y_train.dtype)])
+            weights = np.concatenate([weights, np.zeros(len(missing))])
+            padded_chunks += 1
+        if fitted:
+            rf_model.n_estimators += trees_per_chunk
+        try:
+            rf_model.fit(X_train, y_train, sample_weight=weights)
+        except ValueError as e:
+            # e.g. no bootstrap sample with positive weight in a tiny chunk
+            if fitted:
+                rf_model.n_estimators -= trees_per_chunk
+            skipped_rows += int(weights.sum())
+            print(f"Warning: chunk {index} skipped ({int(weights.sum())} rows): {e}")
+            continue
+        fitted = True
+        tracker.sample()
+    if padded_chunks:
+        print(f"{padded_chunks} chunks lacked a risk level and were padded with zero-weight rows")
+    if not fitted:
+        raise ValueError(f"No chunk of {chunk_size} rows could be fitted")
+    train_seconds = time.perf_counter() - start
+
+    y_true, y_pred = evaluate_streaming(rf_model.predict, csv_path, chunk_size, tracker)
+    accuracy = print_evaluation('RandomForest', y_true, y_pred)
+    return rf_model, {
+        'accuracy': round(accuracy, 4),
+        'train_seconds': round(train_seconds, 2),
+        'test_rows': int(len(y_true)),
+        'chunks': n_chunks,
+        'trees_per_chunk': trees_per_chunk,
+        'n_estimators': rf_model.n_estimators,
+        'padded_chunks': padded_chunks,
+        'skipped_rows': skipped_rows,
+        **tracker.report()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the flood risk models without loading the dataset into memory")
+    parser.add_argument('--data', default=DEFAULT_DATA_PATH, help="CSV file or sharded *.manifest.json")
+    parser.add_argument('--chunk-size', type=int, default=250_000)
+    parser.add_argument('--rf-trees', type=int, default=100)
+    args = parser.parse_args()
+
+    print("="*60)
+    print("Delhi Flood Risk Prediction - Streaming Model Training")
+    print("="*60)
+    print(f"Streaming {args.data} in chunks of {args.chunk_size} rows")
+
+    rf_model, rf_report = train_random_forest_streaming(args.data, args.chunk_size, args.rf_trees)
+    xgb_model, xgb_report = train_xgboost_streaming(args.data, args.chunk_size)
+
+    save_model(rf_model, os.path.join(MODELS_DIR, 'random_forest_model.pkl'), 'rf')
+    save_model(xgb_model, os.path.join(MODELS_DIR, 'xgboost_model.pkl'), 'xgboost')
+    export_flat_forest(rf_model, os.path.join(MODELS_DIR, 'random_forest_flat.joblib'))
+    remove_stale_student(os.path.join(MODELS_DIR, 'distilled_tree.joblib'))
+    with open(os.path.join(MODELS_DIR, 'feature_columns.json'), 'w') as f:
+        json.dump(FEATURE_COLS, f)
+
+    report = {
+        'mode': 'streaming',
+        'data': args.data,
+        'chunk_size': args.chunk_size,
+        'random_forest': rf_report,
+        'xgboost': xgb_report
+    }
+    report_path = os.path.join(MODELS_DIR, 'training_report.json')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "="*50)
+    print("Training Report:")
+    print(json.dumps(report, indent=2))
+    print("="*50)
+    print(f"Report saved to {report_path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,582 @@
+"""
+Offline checks for the inference path
+Runs against the trained model in backend/models (no server needed): python test_inference.py
+or pytest test_inference.py; correctness checks assert, timing comparisons are informational,
+and tests whose trained artifacts are missing are skipped
+"""
+
+import asyncio
+import os
+import time
+
+import joblib
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from cascade_model import CascadeModel
+from demo_stream import DemoBroadcaster
+from flat_forest import FlatForest
+import metrics
+from model_registry import ModelEntry, ModelRegistry
+from prediction_cache import PredictionCache
+from request_coalescer import RequestCoalescer
+from risk_surface import DYNAMIC_COLS, RiskSurface
+from train_model import distill_forest
+
+def setup_module():
+    """pytest: load the models once, as main() does"""
+    app.load_model()
+
+def ward_feature_rows():
+    """One feature row per ward in the dataset, like a city-wide refresh"""
+    if app.feature_cols is None:
+        app.load_model()
+    wards = sorted(app.ward_data['ward_name'].unique()) if app.ward_data is not None else ['Karol Bagh']
+    return [
+        app.build_features(app.PredictionRequest(ward_name=ward, rain_24h_mm=60.0 + (i % 50)))
+        for i, ward in enumerate(wards)
+    ]
+
+def time_call(fn, repeats=5):
+    """Best-of-N wall time in seconds"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def test_batch_matches_per_row():
+    print("Testing batch prediction parity with per-row path...")
+    rows = ward_feature_rows()
+    single = [app.make_prediction(features) for features in rows]
+    batch = app.make_batch_prediction(rows)
+
+    mismatches = sum(
+        1 for a, b in zip(single, batch)
+        if a['flood_risk_level'] != b['flood_risk_level'] or abs(a['confidence'] - b['confidence']) > 1e-9
+    )
+    assert len(single) == len(batch), f"{len(batch)} batch results for {len(single)} rows"
+    assert mismatches == 0, f"{mismatches} of {len(rows)} rows differ"
+    print(f"✅ {len(rows)} rows identical between batch and per-row")
+
+def test_batch_speedup():
+    print("\nMeasuring batch vs per-row latency...")
+    rows = ward_feature_rows()
+    per_row = time_call(lambda: [app.make_prediction(features) for features in rows], repeats=3)
+    batch = time_call(lambda: app.make_batch_prediction(rows), repeats=3)
+
+    print(f"   Rows: {len(rows)}")
+    print(f"   Per-row: {per_row * 1000:.1f} ms")
+    print(f"   Batch:   {batch * 1000:.1f} ms")
+    print(f"   Speedup: {per_row / batch:.1f}x")
+    print("✅ Batch path is faster" if batch < per_row else "⚠️  Batch path is not faster")
+
+def test_single_pass_latency():
+    print("\nMeasuring single-pass vs predict + predict_proba latency...")
+    model = app.model_registry.get()
+    if model is None:
+        pytest.skip("no trained model loaded")
+    rows = ward_feature_rows()
+    vector = np.array([[rows[0].get(col, 0.0) for col in app.feature_cols]])
+
+    def two_pass():
+        model.predict(vector)
+        model.predict_proba(vector)
+
+    legacy = time_call(two_pass, repeats=20)
+    single = time_call(lambda: app.predict_risk(model, vector), repeats=20)
+
+    print(f"   predict + predict_proba: {legacy * 1000:.2f} ms")
+    print(f"   predict_risk:            {single * 1000:.2f} ms")
+    print(f"   Ratio: {legacy / single:.2f}x")
+    print("✅ Single-pass inference is faster" if single < legacy else "⚠️  Single-pass inference is not faster")
+
+def load_sklearn_forest():
+    """The pickled RandomForest and dataset feature matrix, or (None, None)"""
+    if not os.path.exists(app.MODEL_PATH):
+        return None, None
+    if app.feature_cols is None:
+        app.load_model()
+    X = app.ward_data[app.feature_cols].fillna(0).to_numpy(dtype=float)
+    return joblib.load(app.MODEL_PATH), X
+
+def test_flat_forest_parity():
+    print("\nTesting flat forest parity with sklearn predict_proba...")
+    forest, X = load_sklearn_forest()
+    if forest is None:
+        pytest.skip("no trained RandomForest found")
+    flat = FlatForest.from_sklearn(forest)
+    rng = np.random.default_rng(0)
+    # Dataset rows plus perturbed rows that land on other split sides
+    X = np.vstack([X, X * rng.uniform(0.8, 1.2, size=X.shape)])
+
+    max_diff = float(np.abs(flat.predict_proba(X) - forest.predict_proba(X)).max())
+    same_class = bool((flat.predict(X) == forest.predict(X)).all())
+    print(f"   Rows: {len(X)}, max |Δp|: {max_diff:.2e}")
+    assert max_diff < 1e-9, f"flat forest probabilities differ by {max_diff:.2e}"
+    assert same_class, "flat forest predicts different classes"
+    print("✅ Flat forest matches sklearn")
+
+def test_flat_forest_latency():
+    print("\nMeasuring flat forest vs sklearn latency...")
+    forest, X = load_sklearn_forest()
+    if forest is None:
+        pytest.skip("no trained RandomForest found")
+    flat = FlatForest.from_sklearn(forest)
+    X = np.resize(X, (1000, X.shape[1]))
+
+    faster_single = True
+    for n_rows in (1, 1000):
+        batch = X[:n_rows]
+        sk_time = time_call(lambda: forest.predict_proba(batch), repeats=10)
+        flat_time = time_call(lambda: flat.predict_proba(batch), repeats=10)
+        print(f"   {n_rows:>5} rows: sklearn {sk_time * 1000:.2f} ms | flat {flat_time * 1000:.2f} ms"
+              f" | {sk_time / flat_time:.1f}x")
+        if n_rows == 1:
+            faster_single = flat_time < sk_time
+
+    print("✅ Flat forest is faster for single rows" if faster_single
+          else "⚠️  Flat forest is not faster for single rows")
+
+def test_distilled_cascade():
+    print("\nTesting the distilled fast path and cascade escalation...")
+    forest, X = load_sklearn_forest()
+    if forest is None:
+        pytest.skip("no trained RandomForest pickle")
+    y = forest.predict(X)
+    split = {'X_train': X, 'y_train': y, 'X_test': X, 'y_test': y}
+    fast_model, report = distill_forest(forest, split, max_depth=6)
+    full_model = FlatForest.from_sklearn(forest)
+
+    always_escalate = CascadeModel(fast_model, full_model, threshold=1.01)
+    never_escalate = CascadeModel(fast_model, full_model, threshold=0.0)
+    escalates_all = np.allclose(always_escalate.predict_proba(X), full_model.predict_proba(X))
+    fast_only = np.allclose(never_escalate.predict_proba(X), fast_model.predict_proba(X))
+    counted = always_escalate.stats()['escalation_rate'] == 1.0 and never_escalate.escalated == 0
+
+    assert escalates_all, "threshold above 1 should send every row to the full model"
+    assert fast_only, "threshold 0 should answer every row from the student"
+    assert counted, f"escalation counts wrong: {always_escalate.stats()}, {never_escalate.stats()}"
+    assert report['agreement'] > 0.9, f"student agreement {report['agreement']:.3f}"
+    print(f"✅ Cascade routes by confidence (student agreement {report['agreement']:.3f})")
+
+def test_risk_surface_lookup():
+    print("\nTesting risk surface grid lookups and out-of-grid fallback...")
+    model = app.model_registry.get('random_forest')
+    if model is None or app.ward_index is None:
+        pytest.skip("needs the RandomForest and ward data")
+    wards = list(app.ward_index)[:3]
+    static_cols = [col for col in app.feature_cols if col not in DYNAMIC_COLS]
+    statics = np.array([[app.get_ward_defaults(ward)[col] for col in static_cols] for ward in wards])
+    lows, highs = np.array([0, 0, 0, 0, 203.0]), np.array([40, 100, 150, 120, 206.0])
+    predict_proba = lambda matrix: app.model_probabilities(model, matrix)
+    surface = RiskSurface.build(predict_proba, app.feature_cols, wards, statics, lows, highs, 4, 'random_forest')
+
+    # Grid points come back as the model's own probabilities (up to uint8 rounding)
+    rows = np.empty((len(wards) * 2, len(app.feature_cols)))
+    rows[:, surface.static_idx] = np.repeat(statics, 2, axis=0)
+    rows[:, surface.dynamic_idx] = np.tile([lows, highs], (len(wards), 1))
+    hit, probabilities = surface.lookup(rows)
+    on_grid = hit.all() and np.abs(probabilities - predict_proba(rows)).max() < 0.01
+
+    # Inputs outside the grid miss and are scored by the model instead
+    rows[:, surface.dynamic_idx[2]] = 500.0
+    missed = not surface.lookup(rows)[0].any()
+
+    assert on_grid, "grid points do not reproduce the model's probabilities"
+    assert missed, "out-of-grid rows were answered from the surface"
+    print(f"✅ Grid points match the model; out-of-grid rows fall back ({surface.nbytes} bytes)")
+
+def test_demo_payload_hits_risk_surface():
+    print("\nTesting that the /demo city-wide refresh is served from the risk surface...")
+    model_name = app.model_registry.active
+    model = app.model_registry.get(model_name)
+    if model is None or app.ward_index is None:
+        pytest.skip("needs a trained model and ward data")
+    wards = list(app.ward_index)
+    static_cols = [col for col in app.feature_cols if col not in DYNAMIC_COLS]
+    statics = np.array([[app.get_ward_defaults(ward)[col] for col in static_cols] for ward in wards])
+    # Wide enough for every simulated condition build_demo_payload draws
+    lows, highs = np.array([-10, 0, 0, 0, 200.0]), np.array([60, 100, 150, 120, 210.0])
+    predict_proba = lambda matrix: app.model_probabilities(model, matrix, model_name)
+    surface = RiskSurface.build(predict_proba, app.feature_cols, wards, statics, lows, highs, 3, model_name)
+
+    previous, app.risk_surface = app.risk_surface, surface
+    model_rows = metrics.MODEL_ROWS.value(model_name)
+    try:
+        payload = app.build_demo_payload()
+    finally:
+        app.risk_surface = previous
+
+    print(f"   Surface hits: {surface.hits}, misses: {surface.misses}")
+    assert surface.hits == len(payload['ward_data']) and surface.misses == 0, "demo rows missed the surface"
+    assert metrics.MODEL_ROWS.value(model_name) == model_rows, "demo rows were scored by the model"
+    print(f"✅ All {surface.hits} /demo wards answered from the surface")
+
+def test_model_registry_switch():
+    print("\nSwitching the active model and overriding it per request...")
+    registry = app.model_registry
+    if len(registry) < 2:
+        pytest.skip("needs both random_forest and xgboost models")
+    rows = ward_feature_rows()[:20]
+    original = registry.active
+    loaded = {name: registry.get(name) for name in ('random_forest', 'xgboost')}
+    try:
+        registry.set_active('xgboost')
+        active_results = app.make_batch_prediction(rows)
+        override = app.make_batch_prediction(rows, 'random_forest')
+    finally:
+        registry.set_active(original)
+
+    same_objects = all(registry.get(name) is model for name, model in loaded.items())
+    routed = (all(result['model'] == 'xgboost' for result in active_results)
+              and all(result['model'] == 'random_forest' for result in override))
+    assert routed, "results did not come from the active/overridden model"
+    assert same_objects, "switching the active model reloaded a model"
+    print("✅ Requests follow the active model and overrides; no model was reloaded")
+
+def test_reload_during_requests():
+    print("\nReloading the models while requests are in flight...")
+    entries = app.load_model_entries(app.latency_probe_matrix())
+    if len(entries) < 2:
+        pytest.skip("needs two trained models")
+    rows = ward_feature_rows()[:50]
+    active = app.model_registry.active
+    dropped = next(name for name in entries if name != active)
+
+    # A name resolved before a reload dropped its model falls back to the active model
+    resolved = app.resolve_model_name(dropped)
+    app.install_model_entries({name: entry for name, entry in entries.items() if name != dropped})
+    try:
+        single = app.make_prediction(rows[0], resolved)
+        batch = app.make_batch_prediction(rows, resolved)
+    finally:
+        app.install_model_entries(entries)
+    assert single['model'] == active and all(r['model'] == active for r in batch), \
+        "requests for a dropped model were not served by the active model"
+
+    async def reload_under_load():
+        generation = app.model_registry.generation
+        requests = [app.cached_prediction(None, features, dropped) for features in rows]
+        results = await asyncio.gather(app.run_model_reload('test'), *requests, return_exceptions=True)
+        return generation, results
+
+    reloads = app.model_reload_stats['reloads']
+    try:
+        generation, results = asyncio.run(reload_under_load())
+    finally:
+        # Both are bound to the loop asyncio.run just closed
+        app.model_reload_lock = None
+        app.inference_executor._semaphore = None
+    errors = [result for result in results if isinstance(result, BaseException)]
+    print(f"   {len(rows)} requests during the reload, {len(errors)} errors")
+    assert not errors, f"requests failed during the reload: {errors[:3]}"
+    assert app.model_reload_stats['reloads'] == reloads + 1, "reload did not complete"
+    assert app.model_registry.generation > generation, "reload did not bump the registry generation"
+    assert all(result['model'] == dropped for result in results[1:]), "requests switched model"
+    print("✅ In-flight requests finish during a reload; dropped models fall back to the active one")
+
+def test_flood_depth_vectorized():
+    print("\nTesting vectorized flood depth against the per-row estimate...")
+    rng = np.random.default_rng(0)
+    rows = [
+        {'rain_24h_mm': float(rain), 'yamuna_level_m': float(yamuna), 'drain_blockage_risk': float(blockage)}
+        for rain, yamuna, blockage in zip(rng.uniform(0, 250, 2000), rng.uniform(201, 208, 2000),
+                                          rng.uniform(0, 1, 2000))
+    ] + [{}, {'rain_24h_mm': 200}]
+    levels = rng.integers(3, size=len(rows))
+
+    depths = app.calculate_flood_depths(*app.depth_inputs(rows), levels)
+    per_row = np.array([app.calculate_flood_depth(row, int(level)) for row, level in zip(rows, levels)])
+    in_range = (np.all(depths[levels == 2] >= 40) and np.all(depths[levels == 0] <= 10)
+                and np.all((depths[levels == 1] >= 10) & (depths[levels == 1] <= 40)) and depths.max() <= 100)
+    assert np.array_equal(depths, per_row), "array depths differ from the per-row function"
+    assert in_range, "depths outside the risk level caps"
+    print("✅ Array depths match the per-row function and respect the risk level caps")
+
+def test_fallback_rules_vectorized():
+    print("\nTesting the vectorized rule engine and degraded mode...")
+    rows = ward_feature_rows()
+    per_row = [app.make_prediction(features, app.RULES_MODEL) for features in rows]
+    batch = app.make_batch_prediction(rows, app.RULES_MODEL)
+
+    app.degraded_mode = True
+    try:
+        degraded = app.make_batch_prediction(rows)
+    finally:
+        app.degraded_mode = app.DEGRADED_MODE
+    assert per_row == batch, "batch rules differ from per-row rules"
+    assert batch == degraded, "degraded mode did not serve the rules"
+    print(f"✅ {len(rows)} rows: batch rules match per-row rules, degraded mode serves them")
+
+def test_metrics_counts():
+    print("\nChecking model call, fallback and phase metrics...")
+    rows = ward_feature_rows()[:10]
+    model_name = app.model_registry.resolve()
+    calls = metrics.MODEL_CALLS.value(model_name)
+    fallbacks = metrics.FALLBACK_PREDICTIONS.value()
+    # Without the risk surface every row goes through the model
+    surface, app.risk_surface = app.risk_surface, None
+    try:
+        app.make_batch_prediction(rows)
+    finally:
+        app.risk_surface = surface
+    app.fallback_prediction(rows[0])
+
+    exported = metrics.render()
+    counted = (metrics.MODEL_CALLS.value(model_name) == calls + (model_name is not None)
+               and metrics.FALLBACK_PREDICTIONS.value() == fallbacks + 1)
+    phases = all(f'phase="{phase}"' in exported for phase in ('depth_calculation', 'ward_lookup'))
+    assert counted, "model or fallback calls were not counted"
+    assert phases, "phase histograms missing from the export"
+    print("✅ Model and fallback calls are counted and phases are exported")
+
+def test_prediction_cache():
+    print("\nTesting prediction cache keys, LRU eviction, TTL expiry and counters...")
+    cache = PredictionCache(max_size=2, ttl_seconds=60, steps={'rain_24h_mm': 0.5})
+    cols = ['rain_24h_mm', 'elevation_m']
+    # Values in the same bucket share a key; unlisted features are exact
+    near = cache.make_key('Karol Bagh', {'rain_24h_mm': 60.1, 'elevation_m': 215.0}, cols)
+    assert near == cache.make_key('Karol Bagh', {'rain_24h_mm': 59.9, 'elevation_m': 215.0}, cols)
+    assert near != cache.make_key('Karol Bagh', {'rain_24h_mm': 61.0, 'elevation_m': 215.0}, cols)
+    assert near != cache.make_key('Karol Bagh', {'rain_24h_mm': 60.1, 'elevation_m': 215.1}, cols)
+    assert near != cache.make_key('Paharganj', {'rain_24h_mm': 60.1, 'elevation_m': 215.0}, cols)
+
+    assert cache.get('a') is None
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'a' is now the most recently used
+    cache.put('c', 3)           # evicts 'b', the least recently used
+    assert cache.get('b') is None and cache.get('a') == 1 and cache.get('c') == 3
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['size']) == (3, 2, 1, 2), stats
+
+    expiring = PredictionCache(max_size=4, ttl_seconds=0.01)
+    expiring.put('a', 1)
+    assert expiring.get('a') == 1
+    time.sleep(0.02)
+    assert expiring.get('a') is None, "expired entry was served"
+    stats = expiring.stats()
+    assert (stats['expirations'], stats['size'], stats['hits'], stats['misses']) == (1, 0, 1, 1), stats
+
+    assert not PredictionCache(max_size=0).enabled
+    print("✅ Buckets, LRU order, TTL expiry and counters behave as documented")
+
+def test_demo_etag():
+    print("\nTesting /demo ETags and 304 responses...")
+    # Not entered as a context manager, so the startup hooks and refresh loop don't run
+    client = TestClient(app.app)
+    app.demo_snapshot = None
+    first = client.get('/demo')
+    etag = first.headers['etag']
+    assert first.status_code == 200 and first.json()['ward_data'], "no snapshot served"
+    assert first.headers['cache-control'] == 'no-cache'
+
+    for if_none_match in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+        response = client.get('/demo', headers={'If-None-Match': if_none_match})
+        assert response.status_code == 304 and not response.content, f"no 304 for {if_none_match}"
+        assert response.headers['etag'] == etag
+    assert client.get('/demo', headers={'If-None-Match': '"other"'}).status_code == 200
+
+    # A rebuild whose content only differs in its timestamp keeps the snapshot and its ETag
+    payload = app.build_demo_payload()
+    build_demo_payload = app.build_demo_payload
+    app.build_demo_payload = lambda: {**payload, 'timestamp': time.time()}
+    try:
+        snapshot = app.refresh_demo_snapshot()
+        assert app.refresh_demo_snapshot() is snapshot, "unchanged content was re-serialized"
+        payload['stats'] = {**payload['stats'], 'highRisk': payload['stats']['highRisk'] + 1}
+        assert app.refresh_demo_snapshot().etag != snapshot.etag, "changed content kept its ETag"
+    finally:
+        app.build_demo_payload = build_demo_payload
+        app.demo_snapshot = None
+    print(f"✅ Matching If-None-Match gets 304; the ETag follows the content ({etag})")
+
+def test_demo_broadcaster():
+    print("\nTesting /demo/stream fan-out, drop-oldest and resync...")
+
+    def drain(queue):
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    async def fan_out():
+        broadcaster = DemoBroadcaster(queue_size=2)
+        fast, slow = broadcaster.subscribe(), broadcaster.subscribe()
+        broadcaster.publish('d1')
+        broadcaster.publish('d2')
+        assert drain(fast) == ['d1', 'd2']
+        # Without a resync event a full queue drops its oldest event
+        broadcaster.publish('d3')
+        assert drain(fast) == ['d3'] and drain(slow) == ['d2', 'd3']
+        assert broadcaster.stats()['events_dropped'] == 1
+
+        # With one, a full queue is replaced by a single resync event, built once per publish
+        built = []
+        resync = lambda: built.append(1) or 'snapshot'
+        lagging = broadcaster.subscribe()
+        for event in ('d4', 'd5'):
+            broadcaster.publish(event, resync=resync)
+        assert drain(fast) == ['d4', 'd5'] and built == []
+        broadcaster.publish('d6', resync=resync)
+        assert drain(slow) == ['snapshot'] and drain(lagging) == ['snapshot'] and built == [1]
+        assert drain(fast) == ['d6'], "a subscriber with room got the resync"
+        broadcaster.publish('d7', resync=resync)
+        assert drain(slow) == ['d7'], "no deltas after the resync"
+
+        broadcaster.unsubscribe(lagging)
+        return broadcaster.stats()
+
+    stats = asyncio.run(fan_out())
+    print(f"   {stats}")
+    assert (stats['subscribers'], stats['events_published'], stats['events_dropped'], stats['resyncs']) == (2, 7, 5, 2)
+    print("✅ Slow subscribers drop the oldest event, or resync from a snapshot when one is given")
+
+def test_request_coalescer():
+    print("\nTesting request coalescing, batch histogram and error propagation...")
+    calls = []
+
+    def batch_fn(items):
+        calls.append(list(items))
+        if 'bad' in items:
+            raise ValueError("bad row")
+        return [item * 2 for item in items]
+
+    async def run_fn(fn, items):
+        await asyncio.sleep(0)
+        return fn(items)
+
+    async def coalesce():
+        coalescer = RequestCoalescer(batch_fn, run_fn, max_wait_ms=5, max_batch=4)
+        # Six concurrent submits: a full batch of 4 flushes at once, the other 2 on the timer
+        results = await asyncio.gather(*(coalescer.submit(i) for i in range(6)))
+        # One failing row fails every request in its batch
+        errors = await asyncio.gather(coalescer.submit(1), coalescer.submit('bad'), return_exceptions=True)
+        return coalescer, results, errors
+
+    coalescer, results, errors = asyncio.run(coalesce())
+    stats = coalescer.stats()
+    print(f"   batches: {calls}")
+    assert results == [0, 2, 4, 6, 8, 10], "results out of order"
+    assert calls[:2] == [[0, 1, 2, 3], [4, 5]], "submits were not coalesced"
+    assert all(isinstance(error, ValueError) for error in errors), errors
+    assert (stats['batches'], stats['rows'], stats['mean_batch_size']) == (3, 8, 2.67), stats
+    assert stats['batch_size_histogram']['le_2'] == 2 and stats['batch_size_histogram']['le_4'] == 1, stats
+    assert not coalescer._tasks, "finished batch tasks are still referenced"
+    print("✅ Concurrent submits share batches; histogram and errors reach every caller")
+
+def test_generation_cache_keys():
+    print("\nTesting that cached results never outlive the models that made them...")
+    registry = ModelRegistry(default_model='a')
+    entry = lambda model: ModelEntry(model=model, path=None, accuracy=None, p50_ms=None, p99_ms=None)
+    registry.replace({'a': entry('model a'), 'b': entry('model b')})
+    assert registry.generation == 1 and registry.checkout('b') == ('b', 'model b')
+    registry.replace({'a': entry('model a2')})
+    assert registry.generation == 2
+    assert registry.checkout('b') == ('a', 'model a2'), "a dropped model did not fall back to the active one"
+
+    scored = []
+
+    async def swapping_prediction(features, model_name=None):
+        # A reload lands while this request is being scored
+        scored.append(app.model_registry.generation)
+        app.model_registry.replace({})
+        return {'generation': scored[-1]}
+
+    async def cached_twice():
+        first = await app.cached_prediction('Karol Bagh', features, app.RULES_MODEL)
+        second = await app.cached_prediction('Karol Bagh', features, app.RULES_MODEL)
+        return first, second
+
+    features = {col: 1.0 for col in app.feature_cols}
+    previous = app.model_registry, app.run_prediction, app.prediction_cache
+    app.model_registry = ModelRegistry()
+    app.run_prediction = swapping_prediction
+    app.prediction_cache = PredictionCache(max_size=16)
+    try:
+        first, second = asyncio.run(cached_twice())
+        stats = app.prediction_cache.stats()
+    finally:
+        app.model_registry, app.run_prediction, app.prediction_cache = previous
+
+    assert scored == [0, 1], "the result from before the swap was served from the cache"
+    assert first != second and stats['hits'] == 0, stats
+    print("✅ Registry generations tag cache keys; a mid-request swap never leaks a stale result")
+
+def test_demo_delta():
+    print("\nTesting /demo/stream deltas...")
+    def snapshot(**wards):
+        ward_data = {ward: {'flood_risk_level': level, 'confidence': confidence}
+                     for ward, (level, confidence) in wards.items()}
+        return app.DemoSnapshot(etag='', body=b'', payload={'stats': {}, 'ward_data': ward_data})
+
+    last_pushed = dict(app.demo_last_pushed)
+    app.demo_last_pushed.clear()
+    step = app.DEMO_STREAM_CONFIDENCE_DELTA
+    try:
+        first = app.build_demo_delta(snapshot(a=(0, 0.5), b=(1, 0.5)))
+        small = app.build_demo_delta(snapshot(a=(0, 0.5 + step / 2), b=(1, 0.5 - step / 2)))
+        moved = app.build_demo_delta(snapshot(a=(0, 0.5 + step * 1.5), b=(2, 0.5)))
+    finally:
+        app.demo_last_pushed.clear()
+        app.demo_last_pushed.update(last_pushed)
+    assert set(first['ward_data']) == {'a', 'b'} and 'stats' in first
+    assert small is None, "changes below the threshold were pushed"
+    assert set(moved['ward_data']) == {'a', 'b'}, "a confidence or level change was not pushed"
+    print(f"✅ Only level changes and confidence moves of at least {step} are pushed")
+
+def main():
+    print("="*60)
+    print("Inference Test Suite - Delhi Flood Prediction")
+    print("="*60)
+    app.load_model()
+    if app.model_registry.get() is None:
+        print("⚠️  No trained model found - run: python train_model.py")
+    print()
+
+    tests = [
+        ("Batch Parity", test_batch_matches_per_row),
+        ("Batch Speedup", test_batch_speedup),
+        ("Single-Pass Latency", test_single_pass_latency),
+        ("Flat Forest Parity", test_flat_forest_parity),
+        ("Flat Forest Latency", test_flat_forest_latency),
+        ("Distilled Cascade", test_distilled_cascade),
+        ("Risk Surface Lookup", test_risk_surface_lookup),
+        ("Demo Risk Surface Hits", test_demo_payload_hits_risk_surface),
+        ("Model Registry Switch", test_model_registry_switch),
+        ("Reload During Requests", test_reload_during_requests),
+        ("Vectorized Flood Depth", test_flood_depth_vectorized),
+        ("Vectorized Fallback Rules", test_fallback_rules_vectorized),
+        ("Metrics Counts", test_metrics_counts),
+        ("Prediction Cache", test_prediction_cache),
+        ("Demo ETag", test_demo_etag),
+        ("Demo Broadcaster", test_demo_broadcaster),
+        ("Demo Delta", test_demo_delta),
+        ("Request Coalescer", test_request_coalescer),
+        ("Generation Cache Keys", test_generation_cache_keys)
+    ]
+    results = []
+    for test_name, test in tests:
+        try:
+            test()
+            results.append((test_name, "✅ PASS"))
+        except pytest.skip.Exception as e:
+            print(f"⚠️  Skipped: {e}")
+            results.append((test_name, "⚠️  SKIP"))
+        except AssertionError as e:
+            print(f"❌ {e}")
+            results.append((test_name, "❌ FAIL"))
+
+    print("\n" + "="*60)
+    print("Test Results Summary")
+    print("="*60)
+
+    for test_name, status in results:
+        print(f"{status}: {test_name}")
+
+    print("="*60)
+    return all(status != "❌ FAIL" for _, status in results)
+
+if __name__ == '__main__':
+    raise SystemExit(0 if main() else 1)
@@ -6,13 +6,48 @@ Trains RandomForest and XGBoost models on flood risk data
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import xgboost as xgb
 import joblib
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
 import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-import os
+from flat_forest import FlatForest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'DATA'))
+from dataset_io import load_dataset
+
+# Feature columns (excluding target, identifier, and LEAKAGE features)
+# REMOVED: max_flood_depth_cm, avg_reported_depth_cm, citizen_reports_count
+# These are OUTCOMES, not predictors - using them causes 100% accuracy (data leakage)
+FEATURE_COLS = [
+    'distance_to_yamuna_m',
+    'rain_1h_mm',
+    'rain_3h_mm',
+    'rain_24h_mm',
+    'rain_forecast_3h_mm',
+    'elevation_m',
+    'slope_percent',
+    'impervious_ratio',
+    'drain_density',
+    'drain_capacity_score',
+    'drain_blockage_risk',
+    'yamuna_level_m',
+    'flooded_before',  # Historical data - can be used
+    'flood_frequency'  # Historical frequency - can be used (but should be independent)
+]
+
+TARGET_NAMES = ['Safe', 'Warning', 'Danger']
 
 def load_and_prepare_data(csv_path=None):
     """Load CSV data and prepare features"""
@@ -21,27 +56,9 @@ def load_and_prepare_data(csv_path=None):
         csv_path = os.path.join(BASE_DIR, '..', 'DATA', 'delhi_flood_data.csv')
     """Load CSV data and prepare features"""
     print(f"Loading data from {csv_path}...")
-    df = pd.read_csv(csv_path)
-    
-    # Feature columns (excluding target, identifier, and LEAKAGE features)
-    # REMOVED: max_flood_depth_cm, avg_reported_depth_cm, citizen_reports_count
-    # These are OUTCOMES, not predictors - using them causes 100% accuracy (data leakage)
-    feature_cols = [
-        'distance_to_yamuna_m',
-        'rain_1h_mm',
-        'rain_3h_mm',
-        'rain_24h_mm',
-        'rain_forecast_3h_mm',
-        'elevation_m',
-        'slope_percent',
-        'impervious_ratio',
-        'drain_density',
-        'drain_capacity_score',
-        'drain_blockage_risk',
-        'yamuna_level_m',
-        'flooded_before',  # Historical data - can be used
-        'flood_frequency'  # Historical frequency - can be used (but should be independent)
-    ]
+    df = load_dataset(csv_path)
+    
+    feature_cols = FEATURE_COLS
     
     X = df[feature_cols].fillna(0)
     y = df['flood_risk_level'].astype(int)
@@ -51,24 +68,53 @@ def load_and_prepare_data(csv_path=None):
     
     return X, y, feature_cols
 
-def train_random_forest(X, y, feature_cols):
+# Default hyperparameters; `train_model.py search` looks for better ones
+RF_PARAMS = {
+    'n_estimators': 100,
+    'max_depth': 10,
+    'min_samples_split': 5,
+    'min_samples_leaf': 2,
+    'random_state': 42
+}
+
+XGB_PARAMS = {
+    'n_estimators': 100,
+    'max_depth': 6,
+    'learning_rate': 0.1,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'tree_method': 'hist',
+    'random_state': 42,
+    'eval_metric': 'mlogloss'
+}
+
+def build_random_forest(params=None, n_jobs=-1):
+    return RandomForestClassifier(**{**RF_PARAMS, **(params or {})}, n_jobs=n_jobs)
+
+def build_xgboost(params=None, n_jobs=-1):
+    return xgb.XGBClassifier(**{**XGB_PARAMS, **(params or {})}, n_jobs=n_jobs)
+
+def split_data(X, y):
+    """One stratified train/test split shared by every model"""
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    return {
+        'X_train': np.ascontiguousarray(X_train, dtype=np.float32),
+        'X_test': np.ascontiguousarray(X_test, dtype=np.float32),
+        'y_train': y_train.to_numpy(np.int8),
+        'y_test': y_test.to_numpy(np.int8)
+    }
+
+def train_random_forest(split, feature_cols, n_jobs=-1, params=None):
     """Train RandomForest model"""
     print("\n" + "="*50)
     print("Training RandomForest Model...")
     print("="*50)
     
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    X_train, X_test, y_train, y_test = split['X_train'], split['X_test'], split['y_train'], split['y_test']
     
-    rf_model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=10,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        random_state=42,
-        n_jobs=-1
-    )
+    rf_model = build_random_forest(params, n_jobs)
     
     rf_model.fit(X_train, y_train)
     
@@ -78,7 +124,7 @@ def train_random_forest(X, y, feature_cols):
     
     print(f"\nRandomForest Accuracy: {accuracy:.4f}")
     print("\nClassification Report:")
-    print(classification_report(y_test, y_pred, target_names=['Safe', 'Warning', 'Danger']))
+    print(classification_report(y_test, y_pred, target_names=TARGET_NAMES))
     
     # Feature importance
     feature_importance = pd.DataFrame({
@@ -91,25 +137,15 @@ def train_random_forest(X, y, feature_cols):
     
     return rf_model, accuracy
 
-def train_xgboost(X, y, feature_cols):
+def train_xgboost(split, feature_cols, n_jobs=-1, params=None):
     """Train XGBoost model"""
     print("\n" + "="*50)
     print("Training XGBoost Model...")
     print("="*50)
     
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    X_train, X_test, y_train, y_test = split['X_train'], split['X_test'], split['y_train'], split['y_test']
     
-    xgb_model = xgb.XGBClassifier(
-        n_estimators=100,
-        max_depth=6,
-        learning_rate=0.1,
-        subsample=0.8,
-        colsample_bytree=0.8,
-        random_state=42,
-        eval_metric='mlogloss'
-    )
+    xgb_model = build_xgboost(params, n_jobs)
     
     xgb_model.fit(
         X_train, y_train,
@@ -123,7 +159,7 @@ def train_xgboost(X, y, feature_cols):
     
     print(f"\nXGBoost Accuracy: {accuracy:.4f}")
     print("\nClassification Report:")
-    print(classification_report(y_test, y_pred, target_names=['Safe', 'Warning', 'Danger']))
+    print(classification_report(y_test, y_pred, target_names=TARGET_NAMES))
     
     # Feature importance
     feature_importance = pd.DataFrame({
@@ -141,43 +177,221 @@ def save_model(model, model_path, model_type='rf'):
     model_dir = os.path.dirname(model_path)
     if model_dir:
         os.makedirs(model_dir, exist_ok=True)
-    joblib.dump(model, model_path)
+    # Uncompressed so the API can open it with mmap_mode='r'; renamed into place so a
+    # running server (or its hot reload) never maps a half-written file
+    tmp_path = model_path + '.tmp'
+    joblib.dump(model, tmp_path, compress=0)
+    os.replace(tmp_path, model_path)
     print(f"\n{model_type.upper()} model saved to {model_path}")
 
+def remove_stale_student(distilled_path):
+    """Delete a distilled tree left over from an earlier forest (training without --distill)"""
+    if os.path.exists(distilled_path):
+        os.remove(distilled_path)
+        print(f"Removed {distilled_path}: it was distilled from the previous forest")
+
+def export_flat_forest(rf_model, flat_path):
+    """Flatten the RandomForest into packed node arrays for the API's fast evaluator"""
+    flat_model = FlatForest.from_sklearn(rf_model)
+    flat_model.save(flat_path)
+    print(f"Flat forest exported to {flat_path} ({flat_model.n_trees} trees, {len(flat_model.feature)} nodes)")
+
+# Confidence thresholds reported for the distilled fast path -> full forest cascade
+CASCADE_THRESHOLDS = (0.6, 0.7, 0.8, 0.9, 0.95)
+
+def distill_forest(rf_model, split, max_depth=8):
+    """Fit one shallow tree to the forest's class probabilities and measure how often they agree
+
+    Returns the student as a single-tree FlatForest plus an agreement report, including how
+    many rows a confidence-threshold cascade would escalate to the full forest.
+    """
+    print("\n" + "="*50)
+    print(f"Distilling RandomForest into a depth-{max_depth} tree...")
+    print("="*50)
+    
+    student = DecisionTreeRegressor(max_depth=max_depth, min_samples_leaf=20, random_state=42)
+    student.fit(split['X_train'], rf_model.predict_proba(split['X_train']))
+    fast_model = FlatForest.from_sklearn(student, classes=rf_model.classes_)
+    # Tie the student to this exact forest so the API never pairs it with a retrained one
+    fast_model.teacher_fingerprint = FlatForest.from_sklearn(rf_model).fingerprint()
+    
+    X_test, y_test = split['X_test'], split['y_test']
+    teacher_probs = rf_model.predict_proba(X_test)
+    student_probs = fast_model.predict_proba(X_test)
+    teacher_pred = teacher_probs.argmax(axis=1)
+    student_pred = student_probs.argmax(axis=1)
+    confidence = student_probs.max(axis=1)
+    agreement = float((student_pred == teacher_pred).mean())
+    
+    print(f"Student nodes: {len(fast_model.feature)} (forest: {sum(e.tree_.node_count for e in rf_model.estimators_)})")
+    print(f"Agreement with the forest: {agreement:.4f}")
+    print(f"Student accuracy: {accuracy_score(y_test, rf_model.classes_[student_pred]):.4f}")
+    print("\nCascade (escalate when student confidence < threshold):")
+    cascade = []
+    for threshold in CASCADE_THRESHOLDS:
+        escalate = confidence < threshold
+        cascade_pred = np.where(escalate, teacher_pred, student_pred)
+        cascade.append({
+            'threshold': threshold,
+            'escalation_rate': round(float(escalate.mean()), 4),
+            'agreement': round(float((cascade_pred == teacher_pred).mean()), 4),
+            'accuracy': round(float(accuracy_score(y_test, rf_model.classes_[cascade_pred])), 4)
+        })
+        print(f"  threshold {threshold:.2f}: escalates {escalate.mean():6.1%}, "
+              f"agreement {cascade[-1]['agreement']:.4f}, accuracy {cascade[-1]['accuracy']:.4f}")
+    
+    return fast_model, {
+        'max_depth': max_depth,
+        'nodes': int(len(fast_model.feature)),
+        'agreement': round(agreement, 4),
+        'cascade': cascade
+    }
+
+TRAINERS = {
+    'random_forest': train_random_forest,
+    'xgboost': train_xgboost
+}
+
+def core_budgets(names, total_cores=None):
+    """Divide the machine's cores between models trained side by side"""
+    total_cores = total_cores or os.cpu_count() or 1
+    share, extra = divmod(total_cores, len(names))
+    return {name: max(1, share + (1 if i < extra else 0)) for i, name in enumerate(names)}
+
+def train_worker(name, split_path, feature_cols, n_jobs, params=None):
+    """Train one model on the memory-mapped split; returns (model, accuracy, timing, printed output)"""
+    split = joblib.load(split_path, mmap_mode='r')
+    output = io.StringIO()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(output):
+        model, accuracy = TRAINERS[name](split, feature_cols, n_jobs, params)
+    timing = {
+        'wall_seconds': round(time.perf_counter() - wall_start, 2),
+        'cpu_seconds': round(time.process_time() - cpu_start, 2),
+        'n_jobs': n_jobs
+    }
+    return model, accuracy, timing, output.getvalue()
+
+def train_all(split, feature_cols, parallel=True, params=None):
+    """Train every model on one shared split, concurrently in separate processes
+
+    The split is dumped once, uncompressed, and each worker memory-maps it, so the
+    processes share the page cache instead of receiving pickled copies.
+    """
+    names = list(TRAINERS)
+    params = params or {}
+    budgets = core_budgets(names) if parallel else {name: os.cpu_count() or 1 for name in names}
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='flood-split-') as tmp_dir:
+        split_path = os.path.join(tmp_dir, 'split.joblib')
+        joblib.dump(split, split_path, compress=0)
+        if parallel:
+            # spawn, not fork: OpenMP runtimes are not fork-safe
+            with ProcessPoolExecutor(max_workers=len(names),
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = {name: pool.submit(train_worker, name, split_path, feature_cols, budgets[name],
+                                                   params.get(name))
+                           for name in names}
+                results = {name: future.result() for name, future in futures.items()}
+        else:
+            for name in names:
+                results[name] = train_worker(name, split_path, feature_cols, budgets[name], params.get(name))
+
+    for name in names:
+        print(results[name][3], end='')
+    return {name: results[name][:3] for name in names}
+
 def main():
     print("="*60)
     print("Delhi Flood Risk Prediction - ML Model Training")
     print("="*60)
     
-    # Load data
-    X, y, feature_cols = load_and_prepare_data()
+    parser = argparse.ArgumentParser(description="Train the flood risk models")
+    parser.add_argument('--data', default=None, help="CSV file or sharded *.manifest.json")
+    parser.add_argument('--sequential', action='store_true',
+                        help="Train one model at a time with every core instead of in parallel")
+    parser.add_argument('--params', default=None,
+                        help="JSON of per-model hyperparameters, e.g. models/best_params.json from `search`")
+    parser.add_argument('--distill', action='store_true',
+                        help="Also distill the forest into a shallow tree for the API's cascade fast path")
+    parser.add_argument('--distill-depth', type=int, default=8)
+    commands = parser.add_subparsers(dest='command')
+    search_parser = commands.add_parser('search', help="Latency-constrained hyperparameter search")
+    # Imported here: hyperparameter_search builds on this module
+    from hyperparameter_search import add_search_arguments, run_search
+    add_search_arguments(search_parser)
+    args = parser.parse_args()
+    
+    # Load data and split once for both models
+    X, y, feature_cols = load_and_prepare_data(args.data)
+    split = split_data(X, y)
+    del X, y
+    
+    if args.command == 'search':
+        run_search(split, args)
+        return
+    
+    params = None
+    if args.params:
+        with open(args.params) as f:
+            params = json.load(f)
+        print(f"Hyperparameters from {args.params}: {params}")
     
     # Train both models
-    rf_model, rf_accuracy = train_random_forest(X, y, feature_cols)
-    xgb_model, xgb_accuracy = train_xgboost(X, y, feature_cols)
+    wall_start = time.perf_counter()
+    results = train_all(split, feature_cols, parallel=not args.sequential, params=params)
+    total_wall = time.perf_counter() - wall_start
+    rf_model, rf_accuracy, rf_timing = results['random_forest']
+    xgb_model, xgb_accuracy, xgb_timing = results['xgboost']
     
     # Choose best model (for demo, we'll use RandomForest as it's simpler)
     print("\n" + "="*50)
     print("Model Comparison:")
-    print(f"RandomForest Accuracy: {rf_accuracy:.4f}")
-    print(f"XGBoost Accuracy: {xgb_accuracy:.4f}")
+    print(f"RandomForest Accuracy: {rf_accuracy:.4f} "
+          f"(wall {rf_timing['wall_seconds']}s, cpu {rf_timing['cpu_seconds']}s, {rf_timing['n_jobs']} cores)")
+    print(f"XGBoost Accuracy: {xgb_accuracy:.4f} "
+          f"(wall {xgb_timing['wall_seconds']}s, cpu {xgb_timing['cpu_seconds']}s, {xgb_timing['n_jobs']} cores)")
+    print(f"Total training wall time: {total_wall:.2f}s ({'sequential' if args.sequential else 'parallel'})")
     print("="*50)
     
     # Save models
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     rf_path = os.path.join(BASE_DIR, 'models', 'random_forest_model.pkl')
     xgb_path = os.path.join(BASE_DIR, 'models', 'xgboost_model.pkl')
+    flat_path = os.path.join(BASE_DIR, 'models', 'random_forest_flat.joblib')
     feature_path = os.path.join(BASE_DIR, 'models', 'feature_columns.json')
     
     save_model(rf_model, rf_path, 'rf')
     save_model(xgb_model, xgb_path, 'xgboost')
+    export_flat_forest(rf_model, flat_path)
+    
+    distill_report = None
+    distilled_path = os.path.join(BASE_DIR, 'models', 'distilled_tree.joblib')
+    if args.distill:
+        fast_model, distill_report = distill_forest(rf_model, split, args.distill_depth)
+        fast_model.save(distilled_path)
+        print(f"Distilled tree saved to {distilled_path}")
+    else:
+        remove_stale_student(distilled_path)
     
     # Save feature columns for inference
-    import json
     os.makedirs(os.path.dirname(feature_path), exist_ok=True)
     with open(feature_path, 'w') as f:
         json.dump(feature_cols, f)
     
+    report_path = os.path.join(BASE_DIR, 'models', 'training_report.json')
+    with open(report_path, 'w') as f:
+        json.dump({
+            'mode': 'sequential' if args.sequential else 'parallel',
+            'train_rows': int(len(split['y_train'])),
+            'test_rows': int(len(split['y_test'])),
+            'total_wall_seconds': round(total_wall, 2),
+            'random_forest': {'accuracy': round(rf_accuracy, 4), **rf_timing},
+            'xgboost': {'accuracy': round(xgb_accuracy, 4), **xgb_timing},
+            'distilled': distill_report
+        }, f, indent=2)
+    print(f"Training report saved to {report_path}")
+    
     print("\nTraining completed successfully!")
     print(f"Using RandomForest model (Accuracy: {rf_accuracy:.4f})")
 
@@ -33,7 +33,7 @@ function App() {
   const [liveUpdates, setLiveUpdates] = useState([]);
   const [showReportModal, setShowReportModal] = useState(false);
   const [citizenReports, setCitizenReports] = useState([]);
-  const intervalRef = useRef(null);
+  const streamRef = useRef(null);
 
   const updateDashboardData = (data) => {
     if (data.ward_data) {
@@ -88,37 +88,43 @@ function App() {
     }
   };
 
-  const fetchDemoData = async () => {
-    try {
-      const response = await axios.get(`${API_BASE}/demo`, { timeout: 3000 });
-      if (response.data) {
-        updateDashboardData(response.data);
-      }
-    } catch (error) {
-      // Silently fail in demo mode - will use cached/fallback data
-      console.warn('Demo data fetch failed (backend may be offline)');
+  const applyDemoDelta = (data) => {
+    // Deltas only carry the wards that changed since the last push
+    if (data.ward_data) {
+      setWardData(prev => ({ ...prev, ...data.ward_data }));
+    }
+    updateDashboardData({ ...data, ward_data: null });
+  };
+
+  const closeDemoStream = () => {
+    if (streamRef.current) {
+      streamRef.current.close();
+      streamRef.current = null;
     }
   };
 
   useEffect(() => {
     fetchInitialData();
     
-    // Set up demo mode polling
+    // Demo mode: subscribe to pushed ward updates instead of polling /demo
     if (demoMode) {
-      intervalRef.current = setInterval(() => {
-        fetchDemoData();
-      }, 3000);
+      const stream = new EventSource(`${API_BASE}/demo/stream`);
+      stream.addEventListener('snapshot', (event) => {
+        updateDashboardData(JSON.parse(event.data));
+      });
+      stream.addEventListener('delta', (event) => {
+        applyDemoDelta(JSON.parse(event.data));
+      });
+      stream.onerror = () => {
+        // EventSource reconnects on its own - keep showing cached/fallback data
+        console.warn('Demo stream interrupted (backend may be offline)');
+      };
+      streamRef.current = stream;
     } else {
-      if (intervalRef.current) {
-        clearInterval(intervalRef.current);
-      }
+      closeDemoStream();
     }
 
-    return () => {
-      if (intervalRef.current) {
-        clearInterval(intervalRef.current);
-      }
-    };
+    return closeDemoStream;
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [demoMode]);
 